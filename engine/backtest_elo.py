@@ -13,57 +13,36 @@ aynı Poisson+DC(rho) skorlamasıyla 1X2. ELO yoksa o maçta saf DC (graceful).
 Çalıştır (venv, snapshot cache'liyse hızlı):
   SOCCERDATA_DIR=/tmp/soccerdata ../src/lib/data-sources/venv/bin/python backtest_elo.py E0
 """
-import math
 import sys
 
 from features import load_features
 import features_elo as FE
-import model_xg as MX
-from model import _pois, RHO, MAX_GOALS
+import metrics as MT
+import model as M
+import predcache as PC
 
 XG_WEIGHT = 0.75
 TEST_FROM = "2122"
 
 
-def elo_probs(elo_diff, a, b, total, cap_sup=2.5):
+def elo_lambdas(elo_diff, a, b, total, cap_sup=2.5):
     sup = max(-cap_sup, min(cap_sup, a * elo_diff + b))
     lam_h = max(0.05, min(6.0, (total + sup) / 2))
     lam_a = max(0.05, min(6.0, (total - sup) / 2))
-    ph = [_pois(i, lam_h) for i in range(MAX_GOALS + 1)]
-    pa = [_pois(j, lam_a) for j in range(MAX_GOALS + 1)]
-    H = D = A = tot = 0.0
-    for i in range(MAX_GOALS + 1):
-        for j in range(MAX_GOALS + 1):
-            p = ph[i] * pa[j]
-            if i == 0 and j == 0:
-                p *= 1 - lam_h * lam_a * RHO
-            elif i == 1 and j == 0:
-                p *= 1 + lam_a * RHO
-            elif i == 0 and j == 1:
-                p *= 1 + lam_h * RHO
-            elif i == 1 and j == 1:
-                p *= 1 - RHO
-            if p < 0:
-                p = 0.0
-            tot += p
-            if i > j:
-                H += p
-            elif i == j:
-                D += p
-            else:
-                A += p
-    return {"H": H / tot, "D": D / tot, "A": A / tot}
+    return lam_h, lam_a
+
+
+def elo_probs(elo_diff, a, b, total, cap_sup=2.5):
+    pr = M.probs(*elo_lambdas(elo_diff, a, b, total, cap_sup))
+    return {"H": pr["p_home"], "D": pr["p_draw"], "A": pr["p_away"]}
 
 
 def fit_elo_map(matches, grid, snaps, country, test_from=TEST_FROM):
     """Eğitim maçlarında gol-farkı ~ a·elo_diff + b + ortalama toplam gol."""
     sx = sy = sxx = sxy = n = 0.0
     stg = stn = 0.0
-    for m in matches:
-        if m["season"] >= test_from:
-            continue
-        eh = FE.elo_of(grid, snaps, country, m["home"], m["date"])
-        ea = FE.elo_of(grid, snaps, country, m["away"], m["date"])
+    train = [m for m in matches if m["season"] < test_from]
+    for m, eh, ea in zip(train, *FE.SnapshotIndex(grid, snaps).lookup(train, country)):
         stg += m["fthg"] + m["ftag"]; stn += 1
         if eh is None or ea is None:
             continue
@@ -83,29 +62,12 @@ def fit_elo_map(matches, grid, snaps, country, test_from=TEST_FROM):
 def precompute(matches, fd_code, grid, snaps, a, b, total,
                test_from=TEST_FROM, half_life=180, window=540):
     country = FE.CC[fd_code]
-    fit_cache = {}
-
-    def gm(ref):
-        k = ref.toordinal()
-        if k not in fit_cache:
-            fit_cache[k] = MX.fit(matches, ref, xg_weight=XG_WEIGHT,
-                                  half_life_days=half_life, window_days=window)
-        return fit_cache[k]
-
+    # baz xG-DC tahminleri predcache'ten (backtest_context ile ortak, sonraki koşularda diskten)
     preds = []
     elo_hits = 0
-    for m in matches:
-        if m["season"] < test_from or m["ftr"] not in ("H", "D", "A"):
-            continue
-        mdl = gm(m["date"])
-        if mdl is None:
-            continue
-        pr = MX.predict(mdl, m["home"], m["away"])
-        if pr is None:
-            continue
-        p_dc = {"H": pr["p_home"], "D": pr["p_draw"], "A": pr["p_away"]}
-        eh = FE.elo_of(grid, snaps, country, m["home"], m["date"])
-        ea = FE.elo_of(grid, snaps, country, m["away"], m["date"])
+    base = PC.baseline(matches, XG_WEIGHT, test_from, half_life, window, fd_code)
+    homes, aways = FE.SnapshotIndex(grid, snaps).lookup([m for m, _ in base], country)
+    for (m, p_dc), eh, ea in zip(base, homes, aways):
         p_elo = None
         if eh is not None and ea is not None:
             p_elo = elo_probs(eh - ea, a, b, total)
@@ -115,48 +77,20 @@ def precompute(matches, fd_code, grid, snaps, a, b, total,
     return preds, elo_hits
 
 
+def score_grid(preds, lams, ev_threshold=0.05):
+    """Tüm λ'lar tek toplu skorlamada: p = (1-λ)·p_dc + λ·p_elo (ELO'suz maçta p_dc).
+    λ başına sonuç dict'i listesi."""
+    p, y, odds = MT.arrays(preds, "p_dc")
+    q, has = MT.optional(preds, "p_elo", "p_dc")
+    rows = MT.score_batch(MT.blend(p, q, lams, has), y, odds, ev_threshold)
+    for lam, r in zip(lams, rows):
+        if r is not None:
+            r["lam"] = lam
+    return rows
+
+
 def score(preds, lam, ev_threshold=0.05):
-    n = correct = 0
-    brier_sum = logloss_sum = 0.0
-    bets = bet_wins = 0
-    bet_profit = 0.0
-    cal_bins = [[0, 0.0] for _ in range(10)]
-    for e in preds:
-        pd = e["p_dc"]
-        pe = e["p_elo"]
-        if pe is None or lam == 0.0:
-            p = pd
-        else:
-            p = {o: (1 - lam) * pd[o] + lam * pe[o] for o in ("H", "D", "A")}
-        actual = e["actual"]
-        n += 1
-        pick = max(p, key=p.get)
-        if pick == actual:
-            correct += 1
-        bi = min(9, int(p[pick] * 10))
-        cal_bins[bi][0] += 1
-        cal_bins[bi][1] += 1.0 if pick == actual else 0.0
-        for o in ("H", "D", "A"):
-            y = 1.0 if o == actual else 0.0
-            brier_sum += (p[o] - y) ** 2
-        logloss_sum += -math.log(max(p[actual], 1e-9))
-        od = e["odds"]
-        if od["H"] and od["D"] and od["A"]:
-            for o in ("H", "D", "A"):
-                if p[o] * od[o] - 1.0 > ev_threshold:
-                    bets += 1
-                    if o == actual:
-                        bet_profit += od[o] - 1.0
-                        bet_wins += 1
-                    else:
-                        bet_profit -= 1.0
-    if n == 0:
-        return None
-    ece = sum(c * abs((corr / c) - ((b + 0.5) / 10))
-              for b, (c, corr) in enumerate(cal_bins) if c) / n
-    return {"lam": lam, "n": n, "acc": correct / n * 100,
-            "brier": brier_sum / n, "logloss": logloss_sum / n, "ece": ece * 100,
-            "bets": bets, "roi": (bet_profit / bets * 100) if bets else 0.0}
+    return score_grid(preds, [lam], ev_threshold)[0]
 
 
 def run(league="E0", start=2020, end=2024, lambdas=(0.0, 0.1, 0.2, 0.3, 0.4, 0.5),
@@ -174,14 +108,15 @@ def run(league="E0", start=2020, end=2024, lambdas=(0.0, 0.1, 0.2, 0.3, 0.4, 0.5
     cov = ehits / len(preds) * 100 if preds else 0
     print(f"[backtest-elo] {league}: test {len(preds)} maç, ELO kapsama %{cov:.1f} | "
           f"fit a={a:.5f} b={b:+.3f} total={total:.2f} (n={ntrain})")
+    if not preds:
+        print("[backtest-elo] test edilecek maç bulunamadı")
+        return None
     print("=" * 70)
     print(f"  {'λ':>4} | {'1X2%':>6} | {'Brier':>7} | {'LogLoss':>8} | {'ECE%':>5} | {'bets':>4} | {'ROI%':>7}")
     print("-" * 70)
-    base = score(preds, 0.0)
-    results = []
-    for lam in lambdas:
-        r = score(preds, lam)
-        results.append(r)
+    base, *results = score_grid(preds, (0.0,) + tuple(lambdas))
+    for r in results:
+        lam = r["lam"]
         flag = "  <= baseline" if lam == 0 else ""
         print(f"  {lam:>4.2f} | {r['acc']:>6.1f} | {r['brier']:>7.4f} | {r['logloss']:>8.4f} | "
               f"{r['ece']:>5.2f} | {r['bets']:>4d} | {r['roi']:>+7.2f}{flag}")
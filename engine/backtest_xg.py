@@ -6,11 +6,12 @@ Baseline (w=0.0) dahil taranır → gol-DC ile birebir sağlaması.
 Çalıştır (venv, soccerdata gerekli):
   SOCCERDATA_DIR=/tmp/soccerdata ../src/lib/data-sources/venv/bin/python backtest_xg.py E0
 """
-import math
 import sys
 
 from features import load_features
+import metrics as MT
 import model_xg as MX
+from walkforward import MultiWeightFitter
 
 
 def implied_probs(oh, od, oa):
@@ -23,75 +24,35 @@ def implied_probs(oh, od, oa):
 
 def evaluate(matches, xg_weight, test_from_season="2122", ev_threshold=0.05,
              half_life=180, window=540):
-    fit_cache = {}
-
-    def get_model(ref_date):
-        key = ref_date.toordinal()
-        if key not in fit_cache:
-            fit_cache[key] = MX.fit(matches, ref_date, xg_weight=xg_weight,
-                                    half_life_days=half_life, window_days=window)
-        return fit_cache[key]
-
-    n = correct = book_correct = 0
-    brier_sum = logloss_sum = 0.0
-    bets = bet_wins = 0
-    bet_profit = 0.0
-    # kalibrasyon: seçilen sonucun güveni vs isabet (10 bin)
-    cal_bins = [[0, 0.0] for _ in range(10)]  # [count, correct]
-
-    for m in matches:
-        if m["season"] < test_from_season:
-            continue
-        mdl = get_model(m["date"])
-        if mdl is None:
-            continue
-        pr = MX.predict(mdl, m["home"], m["away"])
-        if pr is None:
+    return evaluate_many(matches, (xg_weight,), test_from_season, ev_threshold,
+                         half_life, window)[0]
+
+
+def evaluate_many(matches, weights, test_from_season="2122", ev_threshold=0.05,
+                  half_life=180, window=540):
+    """Tüm xg_weight'ler TEK walk-forward'da (MultiWeightFitter): pencere + zaman ağırlıkları
+    paylaşılır, ağırlık başına yalnız harmanlı hedefle fit. weights sırasıyla sonuç (ya da None)."""
+    wf = MultiWeightFitter(matches, weights, half_life_days=half_life, window_days=window,
+                           tol=MX.FIT_TOL, warm_start=True)
+    rows = [[] for _ in weights]  # ağırlık başına (model_p, maç)
+    test = [m for m in matches if m["season"] >= test_from_season]
+    for m, prs in wf.predict_matches(test):
+        if m["ftr"] not in ("H", "D", "A"):
             continue
-        model_p = {"H": pr["p_home"], "D": pr["p_draw"], "A": pr["p_away"]}
-        actual = m["ftr"]
-        if actual not in ("H", "D", "A"):
-            continue
-        n += 1
-
-        pick = max(model_p, key=model_p.get)
-        conf = model_p[pick]
-        if pick == actual:
-            correct += 1
-        bi = min(9, int(conf * 10))
-        cal_bins[bi][0] += 1
-        cal_bins[bi][1] += 1.0 if pick == actual else 0.0
+        for i, pr in enumerate(prs):
+            if pr is not None:
+                rows[i].append(({"H": pr["p_home"], "D": pr["p_draw"], "A": pr["p_away"]}, m))
+    return [_summary(w, r, ev_threshold) for w, r in zip(weights, rows)]
 
-        for o in ("H", "D", "A"):
-            y = 1.0 if o == actual else 0.0
-            brier_sum += (model_p[o] - y) ** 2
-        logloss_sum += -math.log(max(model_p[actual], 1e-9))
 
-        imp = implied_probs(m["odds_home"], m["odds_draw"], m["odds_away"])
-        if imp:
-            if max(imp, key=imp.get) == actual:
-                book_correct += 1
-            odds = {"H": m["odds_home"], "D": m["odds_draw"], "A": m["odds_away"]}
-            for o in ("H", "D", "A"):
-                if model_p[o] * odds[o] - 1.0 > ev_threshold:
-                    bets += 1
-                    if o == actual:
-                        bet_profit += odds[o] - 1.0
-                        bet_wins += 1
-                    else:
-                        bet_profit -= 1.0
-
-    if n == 0:
-        return None
-    ece = sum(c * abs((corr / c) - ((b + 0.5) / 10)) for b, (c, corr) in enumerate(cal_bins) if c) / n
-    return {
-        "xg_weight": xg_weight, "n": n,
-        "acc": correct / n * 100, "book_acc": book_correct / n * 100,
-        "brier": brier_sum / n, "logloss": logloss_sum / n,
-        "ece": ece * 100,
-        "bets": bets, "roi": (bet_profit / bets * 100) if bets else 0.0,
-        "bet_hit": (bet_wins / bets * 100) if bets else 0.0,
-    }
+def _summary(xg_weight, rows, ev_threshold):
+    r = MT.score([[p[o] for o in MT.OUTCOMES] for p, _ in rows],
+                 [MT.OUTCOME_INDEX[m["ftr"]] for _, m in rows],
+                 [[m["odds_home"], m["odds_draw"], m["odds_away"]] for _, m in rows],
+                 ev_threshold)
+    if r is not None:
+        r["xg_weight"] = xg_weight
+    return r
 
 
 def run(league="E0", weights=(0.0, 0.25, 0.5, 0.75, 1.0), start=2019, end=2024):
@@ -103,10 +64,10 @@ def run(league="E0", weights=(0.0, 0.25, 0.5, 0.75, 1.0), start=2019, end=2024):
     print(f"  {'w':>4} | {'1X2%':>6} | {'Brier':>7} | {'LogLoss':>8} | {'ECE%':>6} | {'bets':>5} | {'ROI%':>7}")
     print("-" * 78)
     results = []
-    for w in weights:
-        r = evaluate(recs, w)
+    for r in evaluate_many(recs, weights):
         if not r:
             continue
+        w = r["xg_weight"]
         results.append(r)
         print(f"  {w:>4.2f} | {r['acc']:>6.1f} | {r['brier']:>7.4f} | {r['logloss']:>8.4f} | "
               f"{r['ece']:>6.2f} | {r['bets']:>5d} | {r['roi']:>+7.2f}")
@@ -0,0 +1,60 @@
+"""
+Fit backend benchmark — saf Python vs numpy dizi motoru (model.fit backend=...).
+Bir E0 sezonunun her farklı maç gününde walk-forward fit'i iki backend ile koşar,
+süreleri ve en büyük parametre farkını (hedef ≤1e-9) raporlar.
+
+Çalıştır (numpy gerekli):
+  python3 bench_fit.py E0 2023
+"""
+import sys
+import time
+
+from data import load_matches
+import model as M
+
+
+def _max_diff(a, b):
+    if a is None or b is None:
+        return 0.0 if a is b else float("inf")
+    d = max(abs(a["H"] - b["H"]), abs(a["base"] - b["base"]))
+    for t in a["teams"]:
+        d = max(d, abs(a["A"][t] - b["A"][t]), abs(a["D"][t] - b["D"][t]))
+    return d
+
+
+def run(league="E0", season_start=2023, half_life=180, window=540):
+    # pencere (540g) dolsun diye bir önceki sezon da yüklenir
+    matches = load_matches(league, season_start - 1, season_start)
+    test_season = f"{str(season_start)[-2:]}{str(season_start + 1)[-2:]}"
+    dates = sorted({m["date"] for m in matches if m["season"] == test_season})
+    print(f"[bench] {league} {test_season}: {len(matches)} maç, {len(dates)} fit günü")
+    if not dates:
+        return None
+
+    timings = {}
+    models = {}
+    for backend in ("py", "numpy"):
+        t0 = time.perf_counter()
+        models[backend] = [M.fit(matches, d, half_life_days=half_life, window_days=window,
+                                 backend=backend) for d in dates]
+        timings[backend] = time.perf_counter() - t0
+
+    diff = max(_max_diff(a, b) for a, b in zip(models["py"], models["numpy"]))
+    fitted = sum(1 for m in models["py"] if m is not None)
+    py_ms = timings["py"] / len(dates) * 1000
+    np_ms = timings["numpy"] / len(dates) * 1000
+    print("=" * 56)
+    print(f"  FIT BENCHMARK — {league} {test_season}  ({fitted}/{len(dates)} fit)")
+    print("=" * 56)
+    print(f"  py     : {timings['py']:>7.2f}s  ({py_ms:.1f} ms/fit)")
+    print(f"  numpy  : {timings['numpy']:>7.2f}s  ({np_ms:.1f} ms/fit)")
+    print(f"  hızlanma: x{timings['py'] / timings['numpy']:.1f}")
+    print(f"  maks. parametre farkı: {diff:.2e}  ({'OK' if diff <= 1e-9 else 'FARK!'})")
+    print("=" * 56)
+    return {"py": timings["py"], "numpy": timings["numpy"], "max_diff": diff}
+
+
+if __name__ == "__main__":
+    league = sys.argv[1] if len(sys.argv) > 1 else "E0"
+    season = int(sys.argv[2]) if len(sys.argv) > 2 else 2023
+    run(league=league, season_start=season)
@@ -0,0 +1,210 @@
+"""
+Sütunlu sonuç deposu — results.jsonl taramasının yerine sabit genişlikli ikili sütunlar.
+
+ResultStore her mtime değişiminde tüm JSONL'i json.loads ile yeniden okuyor, _collect her
+taramada tüm dosyayı id için geziyor, load_for_fit her çağrıda tarih dizgelerini yeniden
+ayrıştırıyordu. Burada her alan ayrı bir dosya (little-endian, `array` tip kodları):
+
+    id.i32  league.i32  ts.i64 (epoch sn, UTC)  home.i32  away.i32  fthg.i8  ftag.i8
+    lidx.<rows>.i32  satır indeksleri; lige göre gruplu, lig içinde (ts, satır) sıralı
+    manifest.json    {"format", "rows", "lidx", "leagues": {lig: [lidx başı, adet]}, ...}
+
+Sütunlar mmap ile okunur (kopyasız memoryview). Yazım yalnız EKLEME: sütun dosyalarına
+eklenir, lidx + manifest geçici dosya + os.replace ile değişir. manifest.json kesinleştirme
+noktasıdır: "rows"tan sonraki baytlar (yarım kalmış yazım) okunmaz, sonraki eklemede kırpılır.
+id dizini (mükerrer önleme) açılışta id sütunundan kurulur. İsimler burada YOK → JSONL
+arşiv/içe-dışa aktarım biçimi olarak kalır (store.py import / export).
+Saf stdlib (array + mmap).
+"""
+import heapq
+import json
+import mmap
+import os
+import sys
+from array import array
+
+try:
+    import fcntl
+except ImportError:  # Windows: tek yazar varsayımı
+    fcntl = None
+
+FORMAT = 1
+COLUMNS = (("id", "i"), ("league", "i"), ("ts", "q"),
+           ("home", "i"), ("away", "i"), ("fthg", "b"), ("ftag", "b"))
+_TYPES = dict(COLUMNS)
+_SUFFIX = {"id": "i32", "league": "i32", "ts": "i64", "home": "i32", "away": "i32",
+           "fthg": "i8", "ftag": "i8"}
+
+
+def _native(a: array) -> array:
+    """Dosya biçimi little-endian; büyük-endian makinede çevir."""
+    if sys.byteorder != "little" and a.itemsize > 1:
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a
+
+
+class ColumnStore:
+    """Ekleme-yalnız sütunlu maç deposu (kök dizin başına bir depo)."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._mtime = None
+        self._cols = {}       # ad -> memoryview (rows uzunluğunda)
+        self._lidx = None
+        self._leagues = {}
+        self._rows = 0
+        self._ids = None
+
+    # ---- okuma ----
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def exists(self) -> bool:
+        return os.path.exists(self._path("manifest.json"))
+
+    def _manifest(self):
+        with open(self._path("manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _map(self, fn, typecode, n):
+        if n == 0:
+            return memoryview(array(typecode))
+        if sys.byteorder != "little" and array(typecode).itemsize > 1:
+            with open(self._path(fn), "rb") as f:
+                a = array(typecode)
+                a.fromfile(f, n)
+            a.byteswap()
+            return memoryview(a)
+        with open(self._path(fn), "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # görünüm mmap'i canlı tutar: eski görünümü tutan okuyucu yeniden eşlemede etkilenmez
+        size = array(typecode).itemsize
+        return memoryview(mm)[:n * size].cast(typecode)
+
+    def refresh(self) -> bool:
+        """Manifest değiştiyse sütunları yeniden eşle. Değişti mi?"""
+        try:
+            st = os.stat(self._path("manifest.json"))
+            mt = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            mt = None
+        if mt == self._mtime and (mt is None or self._cols):
+            return False
+        self._mtime = mt
+        old_rows, ids = self._rows, self._ids
+        if mt is None:
+            self._cols, self._lidx, self._leagues, self._rows = {}, None, {}, 0
+        else:
+            man = self._manifest()
+            if man.get("format") != FORMAT:
+                raise ValueError(f"colstore: desteklenmeyen biçim {man.get('format')}")
+            n = man["rows"]
+            self._cols = {c: self._map(f"{c}.{t}", _TYPES[c], n) for c, t in _SUFFIX.items()}
+            self._lidx = self._map(man["lidx"], "i", n)
+            self._leagues = {int(k): tuple(v) for k, v in man["leagues"].items()}
+            self._rows = n
+        self._ids = None
+        if ids is not None and mt is not None and self._rows >= old_rows:
+            # ekleme-yalnız: id dizini yalnız yeni satırlarla genişler
+            ids.update(self._cols["id"][old_rows:self._rows])
+            self._ids = ids
+        return True
+
+    def __len__(self):
+        self.refresh()
+        return self._rows
+
+    def column(self, name: str) -> memoryview:
+        self.refresh()
+        return self._cols[name]
+
+    def leagues(self) -> dict:
+        """{lig: satır sayısı}."""
+        self.refresh()
+        return {lid: cnt for lid, (_, cnt) in self._leagues.items()}
+
+    def league_rows(self, league_id: int) -> memoryview:
+        """Ligin satır indeksleri, (ts, satır) sıralı."""
+        self.refresh()
+        start, cnt = self._leagues.get(league_id, (0, 0))
+        if not cnt:
+            return memoryview(array("i"))
+        return self._lidx[start:start + cnt]
+
+    def ids(self) -> set:
+        """id dizini (mükerrer kontrolü için)."""
+        self.refresh()
+        if self._ids is None:
+            self._ids = set(self._cols["id"]) if self._rows else set()
+        return self._ids
+
+    # ---- yazma ----
+    def append(self, rows) -> int:
+        """rows: (id, league, ts, home, away, fthg, ftag) demetleri. Var olan id'ler atlanır.
+        Eklenen satır sayısını döndürür."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._mtime = None  # başka yazarın eklediğini gör
+            self.refresh()
+            old_ids, seen = self.ids(), set()
+            new = {c: array(t) for c, t in COLUMNS}
+            for r in rows:
+                if r[0] in old_ids or r[0] in seen:
+                    continue
+                seen.add(r[0])
+                for (c, _), v in zip(COLUMNS, r):
+                    new[c].append(v)
+            added = len(new["id"])
+            if not added:
+                return 0
+            n = self._rows
+            for c, t in _SUFFIX.items():
+                path = self._path(f"{c}.{t}")
+                with open(path, "ab") as f:
+                    f.truncate(n * array(_TYPES[c]).itemsize)  # kesinleşmemiş kuyruğu at
+                    _native(new[c]).tofile(f)
+            self._write_index(n + added, new)
+            self.refresh()
+            return added
+
+    def _write_index(self, total, new):
+        """lidx'i yeni satırları mevcut lig sıralarına KATARAK kur (tüm depo yeniden sıralanmaz).
+        Yeni satırlar neredeyse hep ligin son maçından sonradır → lig başına ekleme; değilse
+        yalnız o lig (ts, satır) ile birleştirilir."""
+        n = total - len(new["id"])
+        ts_old = self._cols.get("ts", ())
+        by_lg = {}
+        for k, (lid, ts) in enumerate(zip(new["league"], new["ts"])):
+            by_lg.setdefault(lid, []).append((ts, n + k))
+        lidx = array("i")
+        leagues = {}
+        for lid in sorted(set(self._leagues) | set(by_lg)):
+            start, cnt = self._leagues.get(lid, (0, 0))
+            cur = self._lidx[start:start + cnt] if cnt else memoryview(array("i"))
+            add = sorted(by_lg.get(lid, ()))
+            leagues[lid] = [len(lidx), cnt + len(add)]
+            if not add or not cnt or ts_old[cur[-1]] <= add[0][0]:
+                lidx.frombytes(cur.tobytes())  # kopya C düzeyinde
+                lidx.extend(i for _, i in add)
+            else:  # geç gelen sonuç: yalnız bu ligi birleştir
+                lidx.extend(i for _, i in heapq.merge(((ts_old[i], i) for i in cur), add))
+        # satır sayısıyla adlandırılır: eski manifest'i okuyan okuyucu eski lidx'i görür
+        lidx_fn = f"lidx.{total}.i32"
+        tmp = self._path(f"{lidx_fn}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            _native(lidx).tofile(f)
+        os.replace(tmp, self._path(lidx_fn))
+        man = {"format": FORMAT, "rows": total, "lidx": lidx_fn,
+               "columns": {c: t for c, t in COLUMNS},
+               "leagues": {str(k): v for k, v in leagues.items()}}
+        tmp = self._path(f"manifest.json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(man, f)
+        os.replace(tmp, self._path("manifest.json"))
+        for fn in os.listdir(self.root):
+            if fn.startswith("lidx.") and fn.endswith(".i32") and fn != lidx_fn:
+                os.remove(self._path(fn))  # açık mmap'ler silinen dosyayı görmeye devam eder
+
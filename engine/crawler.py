@@ -0,0 +1,198 @@
+"""
+Eşzamanlı FotMob tarayıcı — store.backfill / update_recent için (CRAWL_WORKERS > 1).
+
+store._collect günleri tek tek yürür, her istekten sonra REQ_SLEEP (1.5s) bekler ve 429'da
+bloklayarak geri çekilir → 540 günlük backfill, plan daha fazlasına izin verse de 15+ dk.
+Burada:
+  - günler bir iş parçacığı havuzunda çekilir; tüm istekler TEK token bucket'tan geçer
+    (CRAWL_RPS istek/sn);
+  - 429 paylaşılır: bir işçi 429 alınca kova REQ_BACKOFF·2^deneme boyunca HERKESE kapanır;
+  - yazım tek iş parçacığında (çağıran), id üzerinden tekilleştirme → gün sırası önemsiz;
+  - kesinleşen günler store.Ledger'a yazılır (sink içinde); yarıda kalan tarama aynı
+    komutla sürdürülür, tamamlanmış günler yeniden istenmez.
+store'u İÇE AKTARMAZ: istek kurucu, gün ayrıştırıcı, AuthError fabrikası, RateLimited ve
+backoff çağırandan (store._collect) gelir — store.py __main__ olarak koşarken ikinci bir store
+kopyası yüklenip AuthError'ı `except AuthError`dan kaçırmaz. API tabanı istek kurucuyla
+(store._request(path, base) / FOOTBALL_API_BASE) yerel sahte sunucuya yönlendirilebilir:
+  python crawler.py selftest   # yerel sahte HTTP sunucuya karşı tarama sağlaması
+Saf stdlib.
+"""
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class TokenBucket:
+    """İş parçacığı güvenli token bucket; backoff() kovayı tüm işçilere bir süre kapatır."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._t = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._t) * self.rate)
+                    self._t = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, seconds: float):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+def _fetcher(bucket: TokenBucket, request, auth_error, rate_limited, backoff: float,
+             retries: int = 4):
+    """store._fetch'in kovalı sürümü: bekleme kovada, 429 tüm işçilere yansır."""
+    def fetch(path):
+        req = request(path)
+        for attempt in range(retries):
+            bucket.acquire()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as r:
+                    return json.loads(r.read().decode("utf-8"))
+            except urllib.error.HTTPError as e:
+                if e.code == 429:
+                    wait = backoff * (2 ** attempt)
+                    print(f"   429 rate-limit; tüm işçiler {wait:.0f}s bekliyor "
+                          f"(deneme {attempt+1}/{retries})")
+                    bucket.backoff(wait)
+                    continue
+                if e.code in (401, 403):
+                    raise auth_error(e.code)
+                raise
+        raise rate_limited("429 tekrar denemeleri tükendi")
+    return fetch
+
+
+def crawl(days, sink, fetch_day, request, auth_error, rate_limited=RuntimeError,
+          workers: int = 4, rate: float = 2.0, backoff: float = 10.0) -> int:
+    """
+    days: date listesi. sink(gün, maçlar) → eklenen sayı; çağıran iş parçacığında koşar.
+    fetch_day(YYYYMMDD, fetch) → maç listesi (store.matches_by_date); request(path) →
+    urllib Request (taban + başlıklar); auth_error(kod) → fırlatılacak istisna.
+    AuthError taramayı durdurur; rate-limit/ağ hatası alan gün atlanır (sink'e gitmez →
+    ledger'a girmez, sonraki çalıştırmada yeniden denenir).
+    """
+    print(f"[crawl] {len(days)} gün, {workers} işçi, {rate:g} istek/sn")
+    fetch = _fetcher(TokenBucket(rate), request, auth_error, rate_limited, backoff)
+    added = 0
+    failed = 0
+    ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+    try:
+        futs = {ex.submit(fetch_day, d.strftime("%Y%m%d"), fetch): d for d in days}
+        for fut in as_completed(futs):
+            day = futs[fut]
+            ymd = day.strftime("%Y%m%d")
+            try:
+                ms = fut.result()
+            except (rate_limited, OSError, ValueError) as e:
+                # AuthError BİLEREK yakalanmıyor -> tarama durur (anahtar/plan sorunu)
+                failed += 1
+                print(f"  [store] {ymd} atlandı: {e}")
+                continue
+            day_added = sink(day, ms)
+            added += day_added
+            print(f"  [store] {ymd}: {len(ms)} maç, +{day_added} yeni (toplam +{added})")
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+    if failed:
+        print(f"[crawl] {failed} gün alınamadı — aynı komutla sürdür (yalnız eksikler istenir)")
+    return added
+
+
+def _selftest():
+    """Yerel sahte sunucu: gün başına 3 maç, bir gün önce 429, bir gün 403 → AuthError."""
+    from datetime import date, timedelta
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Auth(Exception):
+        pass
+
+    class Limited(Exception):
+        pass
+
+    hits = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            ymd = self.path.rsplit("=", 1)[-1]
+            with lock:
+                hits[ymd] = hits.get(ymd, 0) + 1
+                n = hits[ymd]
+            if ymd == self.server.forbidden:
+                self.send_error(403)
+                return
+            if ymd == self.server.limited and n == 1:
+                self.send_error(429)
+                return
+            body = json.dumps({"response": {"matches": [
+                {"id": f"{ymd}-{k}"} for k in range(3)]}}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(12)]
+    srv.limited, srv.forbidden = days[3].strftime("%Y%m%d"), None
+
+    def request(path):
+        return urllib.request.Request(base + path)
+
+    def fetch_day(ymd, fetch):
+        return fetch(f"/football-get-matches-by-date?date={ymd}")["response"]["matches"]
+
+    got = {}
+
+    def sink(day, ms):
+        got[day] = len(ms)
+        return len(ms)
+
+    kw = dict(fetch_day=fetch_day, request=request, auth_error=lambda code: Auth(code),
+              rate_limited=Limited, workers=4, rate=50.0, backoff=0.05)
+    try:
+        added = crawl(days, sink, **kw)
+        assert added == 3 * len(days) and set(got) == set(days), (added, got)
+        assert hits[srv.limited] == 2, hits[srv.limited]
+        srv.forbidden = days[5].strftime("%Y%m%d")
+        try:
+            crawl(days, sink, **kw)
+        except Auth:
+            pass
+        else:
+            raise AssertionError("403 AuthError'a dönüşmedi")
+    finally:
+        srv.shutdown()
+    print(f"[crawl] selftest ✓ {base}: {added} maç, 429 yeniden denendi, 403 → AuthError")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["selftest"]:
+        _selftest()
+    else:
+        print("kullanım: crawler.py selftest")
@@ -1,15 +1,31 @@
 """
 Veri yükleyici — football-data.co.uk (ücretsiz: sonuç + kapanış oranları).
 Saf stdlib (urllib + csv). Bağımlılık yok.
+
+İki seviye önbellek (CACHE_DIR):
+  <lig>_<sezon>.csv            ham CSV (indirme)
+  parsed/<lig>_<sezon>.pkl     ayrıştırılmış maç kayıtları; CSV boyutu + mtime ile anahtarlı
+                               → tekrar yüklemede csv/strptime hiç çalışmaz. PARSE_CACHE=0 kapatır.
+  <lig>_<sezon>.meta.json      ETag / Last-Modified (koşullu yenileme için)
+
+prefetch(ligler, sezonlar, workers=N): önbelleği eşzamanlı doldurur; süren sezon(lar)ı
+If-None-Match / If-Modified-Since ile yeniler (304 → indirme yok), biten sezonlar yalnız
+eksikse indirilir. Yazımlar geçici dosya + os.replace (yarım CSV kalmaz).
 """
 import csv
 import io
+import json
 import os
+import pickle
+import urllib.error
 import urllib.request
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 CACHE_DIR = os.environ.get("ENGINE_CACHE", "/tmp/ffdata")
 BASE = "https://www.football-data.co.uk/mmz4281"
+PARSE_CACHE = os.environ.get("PARSE_CACHE", "1") != "0"
+PARSE_VERSION = 1  # kayıt şekli değişirse artır → eski .pkl'ler yok sayılır
 
 # Lig kodları (football-data.co.uk): E0=Premier League, SP1=LaLiga, I1=Serie A,
 # D1=Bundesliga, F1=Ligue 1, N1=Eredivisie, P1=Primeira, T1=Süper Lig, E1=Championship
@@ -23,19 +39,88 @@ def season_codes(start_year: int, end_year: int):
     return out
 
 
-def _download(league: str, season: str) -> str:
+def _cached(path: str) -> bool:
+    return os.path.exists(path) and os.path.getsize(path) > 1000
+
+
+def _fetch_csv(league: str, season: str, revalidate: bool = False) -> str:
+    """CSV'yi önbelleğe getir → 'cached' | 'downloaded' | 'not-modified'.
+    revalidate=True: önbellekte olsa da koşullu istekle sunucuya sor."""
     os.makedirs(CACHE_DIR, exist_ok=True)
     path = os.path.join(CACHE_DIR, f"{league}_{season}.csv")
-    if os.path.exists(path) and os.path.getsize(path) > 1000:
-        with open(path, "r", encoding="latin-1") as f:
-            return f.read()
+    meta_path = os.path.join(CACHE_DIR, f"{league}_{season}.meta.json")
+    have = _cached(path)
+    if have and not revalidate:
+        return "cached"
+    headers = {"User-Agent": "Mozilla/5.0"}
+    meta = {}
+    if have and os.path.exists(meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
     url = f"{BASE}/{season}/{league}.csv"
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urllib.request.urlopen(req, timeout=30) as r:
-        raw = r.read().decode("latin-1")
-    with open(path, "w", encoding="latin-1") as f:
-        f.write(raw)
-    return raw
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as r:
+            body = r.read()
+            meta = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and have:
+            return "not-modified"  # dosya + mtime aynı kalır → ayrıştırma önbelleği geçerli
+        raise
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+    tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+    return "downloaded"
+
+
+def _current_season_start(today=None) -> int:
+    """Süren sezonun başlangıç yılı (football-data sezonları ~Ağustos–Mayıs)."""
+    today = today or datetime.now(timezone.utc).date()
+    return today.year if today.month >= 7 else today.year - 1
+
+
+def prefetch(leagues, seasons, workers: int = 4, refresh: bool = False, verbose: bool = True):
+    """
+    leagues × seasons CSV'lerini önbelleğe eşzamanlı indir. seasons: başlangıç yılları (2024)
+    ya da sezon kodları ("2425"). Süren sezon (ve sonrası) koşullu istekle yenilenir;
+    refresh=True tüm sezonları yeniden doğrular. {(lig, sezon): durum} döndürür.
+    """
+    codes = [s if isinstance(s, str) else season_codes(s, s)[0] for s in seasons]
+    live = season_codes(_current_season_start(), _current_season_start())[0]
+    jobs = [(lg, sc) for lg in leagues for sc in codes]
+
+    def one(job):
+        lg, sc = job
+        try:
+            return job, _fetch_csv(lg, sc, revalidate=refresh or sc >= live)
+        except Exception as e:
+            return job, f"error: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        out = dict(ex.map(one, jobs))
+    if verbose:
+        counts = {}
+        for st in out.values():
+            k = "error" if st.startswith("error") else st
+            counts[k] = counts.get(k, 0) + 1
+        print(f"  [data] prefetch {len(jobs)} CSV: "
+              + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+        for (lg, sc), st in out.items():
+            if st.startswith("error"):
+                print(f"  [data] {lg} {sc} indirilemedi: {st[7:]}")
+    return out
 
 
 def _parse_date(s: str):
@@ -60,46 +145,92 @@ def _f(row, *keys):
     return None
 
 
+def _parse_csv(raw: str, season: str):
+    """Bir sezon CSV'sini normalize maç kayıtlarına çevir (dosya sırası)."""
+    matches = []
+    reader = csv.DictReader(io.StringIO(raw))
+    for row in reader:
+        # BOM temizliği
+        row = { (k.lstrip("﻿") if k else k): v for k, v in row.items() }
+        d = _parse_date(row.get("Date", ""))
+        fthg, ftag = row.get("FTHG"), row.get("FTAG")
+        if d is None or fthg in (None, "", "NA") or ftag in (None, "", "NA"):
+            continue
+        # Kapanış oranları: PSC (Pinnacle closing) > PS > B365 > WH
+        oh = _f(row, "PSCH", "PSH", "B365H", "WHH", "AvgH")
+        od = _f(row, "PSCD", "PSD", "B365D", "WHD", "AvgD")
+        oa = _f(row, "PSCA", "PSA", "B365A", "WHA", "AvgA")
+        try:
+            fh, fa = int(float(fthg)), int(float(ftag))
+        except ValueError:
+            continue
+        matches.append({
+            "date": d,
+            "season": season,
+            "home": (row.get("HomeTeam") or "").strip(),
+            "away": (row.get("AwayTeam") or "").strip(),
+            "fthg": fh,
+            "ftag": fa,
+            "ftr": row.get("FTR", "").strip(),  # H/D/A
+            "odds_home": oh,
+            "odds_draw": od,
+            "odds_away": oa,
+        })
+    return matches
+
+
+def _csv_path(league: str, season: str) -> str:
+    """Ham CSV'nin yolu; önbellekte yoksa indirir."""
+    path = os.path.join(CACHE_DIR, f"{league}_{season}.csv")
+    if not _cached(path):
+        _fetch_csv(league, season)
+    return path
+
+
+def _load_season(league: str, season: str):
+    """Bir sezonun kayıtları: geçerli .pkl varsa ondan, yoksa CSV'yi ayrıştırıp .pkl yazar."""
+    path = _csv_path(league, season)
+    st = os.stat(path)
+    key = (PARSE_VERSION, st.st_size, st.st_mtime_ns)
+    pkl = os.path.join(CACHE_DIR, "parsed", f"{league}_{season}.pkl")
+    if PARSE_CACHE and os.path.exists(pkl):
+        try:
+            with open(pkl, "rb") as f:
+                cached_key, matches = pickle.load(f)
+            if cached_key == key:
+                return matches
+        except Exception:
+            pass  # bozuk/eski önbellek → yeniden ayrıştır
+    with open(path, "r", encoding="latin-1") as f:
+        matches = _parse_csv(f.read(), season)
+    if PARSE_CACHE:
+        os.makedirs(os.path.dirname(pkl), exist_ok=True)
+        tmp = f"{pkl}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((key, matches), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, pkl)
+    return matches
+
+
+def load_frame(league: str, start_year: int, end_year: int):
+    """load_matches'in sütunlu (frame.MatchFrame) sürümü."""
+    from frame import MatchFrame
+    return MatchFrame.from_records(load_matches(league, start_year, end_year))
+
+
 def load_matches(league: str, start_year: int, end_year: int):
     """
     Maç listesi döndürür (tarihe göre sıralı). Her maç:
     date, home, away, fthg, ftag, ftr, odds_home/draw/away (kapanış, Pinnacle>B365>WH)
+    Her çağrı yeni dict'ler döndürür (çağıranlar kayıtlara alan ekleyebilir).
     """
     matches = []
     for season in season_codes(start_year, end_year):
         try:
-            raw = _download(league, season)
+            matches.extend(_load_season(league, season))
         except Exception as e:
             print(f"  [data] {league} {season} indirilemedi: {e}")
             continue
-        reader = csv.DictReader(io.StringIO(raw))
-        for row in reader:
-            # BOM temizliği
-            row = { (k.lstrip("﻿") if k else k): v for k, v in row.items() }
-            d = _parse_date(row.get("Date", ""))
-            fthg, ftag = row.get("FTHG"), row.get("FTAG")
-            if d is None or fthg in (None, "", "NA") or ftag in (None, "", "NA"):
-                continue
-            # Kapanış oranları: PSC (Pinnacle closing) > PS > B365 > WH
-            oh = _f(row, "PSCH", "PSH", "B365H", "WHH", "AvgH")
-            od = _f(row, "PSCD", "PSD", "B365D", "WHD", "AvgD")
-            oa = _f(row, "PSCA", "PSA", "B365A", "WHA", "AvgA")
-            try:
-                fh, fa = int(float(fthg)), int(float(ftag))
-            except ValueError:
-                continue
-            matches.append({
-                "date": d,
-                "season": season,
-                "home": (row.get("HomeTeam") or "").strip(),
-                "away": (row.get("AwayTeam") or "").strip(),
-                "fthg": fh,
-                "ftag": fa,
-                "ftr": row.get("FTR", "").strip(),  # H/D/A
-                "odds_home": oh,
-                "odds_draw": od,
-                "odds_away": oa,
-            })
     matches.sort(key=lambda m: m["date"])
     return matches
 
@@ -0,0 +1,139 @@
+"""
+ClubElo snapshot deposu (disk) — features_elo.build_snapshots için.
+
+build_snapshots her Pazartesi için read_by_date'i sırayla çağırıp DataFrame'i iterrows +
+elo_key ile satır satır çeviriyordu; 5 lig × 5 sezon = yüzlerce ardışık istek, her koşuda.
+Burada haftalar tek bir seyrek tabloda tutulur:
+
+    week.i32   hafta (Pazartesi) ordinal'i
+    key.i32    (ülke, canonical anahtar) kodu → manifest "keys"[kod]
+    elo.f32    ELO (float32)
+    manifest.json  {"format", "version", "rows", "keys": [[ülke, anahtar], ...], "weeks": [...]}
+
+Yazım yalnız EKLEME (colstore ile aynı düzen): sütunlara eklenir, manifest geçici dosya +
+os.replace ile değişir ve kesinleştirme noktasıdır ("rows"tan sonrası okunmaz, sonraki
+eklemede kırpılır). VERSION canonical anahtar kuralıyla (features_elo._ELO_FIX / canon)
+birlikte artırılır → eski depo yok sayılıp yeniden kurulur. Saf stdlib (array).
+"""
+import json
+import os
+import sys
+from array import array
+from datetime import date
+
+try:
+    import fcntl
+except ImportError:  # Windows: tek yazar varsayımı
+    fcntl = None
+
+FORMAT = 1
+VERSION = 1
+COLUMNS = (("week", "i"), ("key", "i"), ("elo", "f"))
+_SUFFIX = {"week": "i32", "key": "i32", "elo": "f32"}
+
+
+def _native(a: array) -> array:
+    """Dosya biçimi little-endian; büyük-endian makinede çevir."""
+    if sys.byteorder != "little" and a.itemsize > 1:
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a
+
+
+class SnapshotStore:
+    """Hafta × (ülke, anahtar) → ELO tablosu (kök dizin başına bir depo)."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _manifest(self):
+        try:
+            with open(self._path("manifest.json"), encoding="utf-8") as f:
+                man = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if man.get("format") != FORMAT or man.get("version") != VERSION:
+            return None
+        return man
+
+    def _read(self, man):
+        n = man["rows"]
+        cols = {}
+        for c, t in COLUMNS:
+            a = array(t)
+            if n:
+                with open(self._path(f"{c}.{_SUFFIX[c]}"), "rb") as f:
+                    a.fromfile(f, n)
+                if sys.byteorder != "little":
+                    a.byteswap()
+            cols[c] = a
+        return cols
+
+    def weeks(self) -> set:
+        """Depodaki Pazartesi'ler (date)."""
+        man = self._manifest()
+        return {date.fromordinal(o) for o in man["weeks"]} if man else set()
+
+    def load(self, weeks=None) -> dict:
+        """{Pazartesi: {(ülke, anahtar): elo}} — weeks verilirse yalnız onlar."""
+        man = self._manifest()
+        if not man:
+            return {}
+        want = None if weeks is None else {w.toordinal() for w in weeks}
+        keys = [tuple(k) for k in man["keys"]]
+        cols = self._read(man)
+        out = {}
+        for w, k, e in zip(cols["week"], cols["key"], cols["elo"]):
+            if want is not None and w not in want:
+                continue
+            d = out.get(w)
+            if d is None:
+                d = out[w] = {}
+            d[keys[k]] = e
+        return {date.fromordinal(w): d for w, d in out.items()}
+
+    def add(self, weeks: dict) -> int:
+        """weeks: {Pazartesi: [(ülke, anahtar, elo), ...]}. Depoda olan hafta atlanır.
+        Eklenen satır sayısı."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            man = self._manifest() or {"format": FORMAT, "version": VERSION, "rows": 0,
+                                        "keys": [], "weeks": []}
+            have = set(man["weeks"])
+            code = {tuple(k): i for i, k in enumerate(man["keys"])}
+            new = {c: array(t) for c, t in COLUMNS}
+            added_weeks = []
+            for wk, rows in sorted(weeks.items()):
+                o = wk.toordinal()
+                if o in have or not rows:
+                    continue
+                for country, key, elo in rows:
+                    k = code.get((country, key))
+                    if k is None:
+                        k = code[(country, key)] = len(man["keys"])
+                        man["keys"].append([country, key])
+                    new["week"].append(o)
+                    new["key"].append(k)
+                    new["elo"].append(elo)
+                added_weeks.append(o)
+                have.add(o)
+            added = len(new["week"])
+            if not added:
+                return 0
+            n = man["rows"]
+            for c, t in COLUMNS:
+                with open(self._path(f"{c}.{_SUFFIX[c]}"), "ab") as f:
+                    f.truncate(n * array(t).itemsize)  # kesinleşmemiş kuyruğu at
+                    _native(new[c]).tofile(f)
+            man["rows"] = n + added
+            man["weeks"] = sorted(set(man["weeks"]) | set(added_weeks))
+            tmp = self._path(f"manifest.json.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(man, f)
+            os.replace(tmp, self._path("manifest.json"))
+            return added
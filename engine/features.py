@@ -4,19 +4,24 @@ Maç başına birleştirilmiş eğitim çerçevesi üretir; her kayıt kaynak ü
   sources = {"goals": {...}, "xg": {...}}  → source_name / source_url / fetched_at
 
 Takım-adı normalizasyonu #1 risk: FD ("Man City") ↔ Understat ("Manchester City").
-Sezon-içi çift-yönlü eşleme: alias sözlüğü → normalize-eşit → difflib fallback (greedy bijection).
+Sezon-içi çift-yönlü eşleme: alias sözlüğü → normalize-eşit → teammatch (n-gram adayları +
+difflib skoru + global bijection).
 Eşleşmeyen takım = uyarı + kapsama logu (sessiz veri düşmesi yok).
 
 soccerdata gerektirir → venv python ile çalıştır:
   SOCCERDATA_DIR=/tmp/soccerdata ../src/lib/data-sources/venv/bin/python features.py E0
+  (... features.py E0 --save-aliases → kesin bulanık eşlemeleri takma ad dosyasına ekler)
 """
 import difflib
+import os
 import re
 import sys
 import unicodedata
 from datetime import datetime, timezone
+from functools import lru_cache
 
 from data import load_matches, season_codes
+import teammatch
 
 # FD kodu → (Understat lig adı). Kapsanan ligler.
 LEAGUES = {
@@ -64,36 +69,65 @@ _ALIASES = {
 }
 
 
+_PUNCT = str.maketrans({"&": " and ", "'": "", ".": " ", "-": " "})
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]")
+_SPACES = re.compile(r"\s+")
+CANON_CACHE = int(os.environ.get("CANON_CACHE", "65536"))  # farklı ad sayısı üst sınırı
+
+
 def _strip_accents(s: str) -> str:
     return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
 
 
+@lru_cache(maxsize=CANON_CACHE)
 def canon(name: str) -> str:
-    """Normalize: aksan/nokta/kesme/çoklu boşluk temizle, alias uygula."""
+    """Normalize: aksan/nokta/kesme/çoklu boşluk temizle, alias uygula.
+    Ad başına bir kez hesaplanır (önbellek; istatistik: canon_stats())."""
     s = _strip_accents((name or "").lower().strip())
-    s = s.replace("&", " and ").replace("'", "").replace(".", " ").replace("-", " ")
-    s = re.sub(r"[^a-z0-9 ]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = s.translate(_PUNCT)
+    s = _NON_ALNUM.sub(" ", s)
+    s = _SPACES.sub(" ", s).strip()
     if s in _ALIASES:
         s = _ALIASES[s]
     # yaygın gürültü ekleri (alias sonrası bir daha dene)
     if s in _ALIASES:
         s = _ALIASES[s]
-    return s
+    return sys.intern(s)
+
+
+def canon_many(names):
+    """canon()'un toplu hali: aynı sırada liste; tekrar eden adlar bir kez normalize edilir."""
+    return [canon(n) for n in names]
+
+
+def canon_stats() -> dict:
+    """canon önbelleği: {"hits", "misses", "size", "max"}."""
+    ci = canon.cache_info()
+    return {"hits": ci.hits, "misses": ci.misses, "size": ci.currsize, "max": ci.maxsize}
+
 
+def _similar(a, b):
+    return difflib.SequenceMatcher(None, canon(a), canon(b)).ratio()
 
-def build_team_map(fd_teams, us_teams):
+
+ALIAS_NS = "understat:fd"
+ALIAS_CONFIRM = 0.9   # save_aliases=True iken dosyaya yazılan bulanık eşlemenin min. skoru
+
+
+def build_team_map(fd_teams, us_teams, save_aliases=False):
     """
     Understat adı → FD adı eşlemesi (sezon-içi bijection).
-    Önce canonical-eşit, sonra difflib greedy en-iyi eşleşme. Eşleşmeyeni raporlar.
+    Önce canonical-eşit, sonra teammatch (aday indeksi + difflib skoru + global atama).
+    Takma ad dosyası yalnız OKUNUR; save_aliases=True (açık adım: features.py LİG
+    --save-aliases) skoru >= ALIAS_CONFIRM bulanık eşlemeleri dosyaya ekler.
+    Eşleşmeyeni raporlar.
     """
     fd_by_canon = {}
-    for t in fd_teams:
-        fd_by_canon.setdefault(canon(t), t)
+    for t, c in zip(fd_teams, canon_many(fd_teams)):
+        fd_by_canon.setdefault(c, t)
 
     mapping = {}          # us_name -> fd_name
     used_fd = set()
-    unmatched_us = []
 
     # 1) canonical-eşit
     remaining_us = []
@@ -105,30 +139,20 @@ def build_team_map(fd_teams, us_teams):
         else:
             remaining_us.append(us)
 
-    # 2) difflib fallback (kalan FD'ler arasında en yakın)
+    # 2) bulanık: n-gram indeksinden top-k aday, difflib yalnız onlara, global atama
     fd_pool = [t for t in fd_teams if t not in used_fd]
-    fd_canons = {t: canon(t) for t in fd_pool}
-    for us in remaining_us:
-        c = canon(us)
-        best, best_score = None, 0.0
-        for t in fd_pool:
-            if t in used_fd:
-                continue
-            score = difflib.SequenceMatcher(None, c, fd_canons[t]).ratio()
-            if score > best_score:
-                best, best_score = t, score
-        if best and best_score >= 0.55:
-            mapping[us] = best
-            used_fd.add(best)
-        else:
-            unmatched_us.append((us, best, round(best_score, 2)))
+    fuzzy, unmatched_us = teammatch.match(
+        remaining_us, fd_pool, _similar, 0.55, normalize=canon, namespace=ALIAS_NS,
+        confirm=ALIAS_CONFIRM if save_aliases else None)
+    mapping.update(fuzzy)
 
     return mapping, unmatched_us
 
 
-def load_features(fd_code, start_year, end_year, verbose=True):
+def load_features(fd_code, start_year, end_year, verbose=True, save_aliases=False):
     """
     Sezon-sezon FD(gol+oran) + Understat(xG) birleştir. Provenance'lı kayıt listesi döndürür.
+    save_aliases: bkz. build_team_map (varsayılan: takma ad dosyasına yazılmaz).
     Her kayıt: date, season, home, away (FD adı), fthg, ftag, ftr, odds_*, home_xg, away_xg, sources.
     """
     import logging
@@ -162,7 +186,7 @@ def load_features(fd_code, start_year, end_year, verbose=True):
 
         fd_teams = sorted({m["home"] for m in fd} | {m["away"] for m in fd})
         us_teams = sorted(set(sch["home_team"]) | set(sch["away_team"]))
-        tmap, unmatched = build_team_map(fd_teams, us_teams)
+        tmap, unmatched = build_team_map(fd_teams, us_teams, save_aliases)
         if verbose and unmatched:
             print(f"  [xg] {fd_code} {season} EŞLEŞMEYEN Understat takım: {unmatched}")
 
@@ -203,7 +227,7 @@ def load_features(fd_code, start_year, end_year, verbose=True):
 
 if __name__ == "__main__":
     code = sys.argv[1] if len(sys.argv) > 1 else "E0"
-    recs, stats = load_features(code, 2019, 2024)
+    recs, stats = load_features(code, 2019, 2024, save_aliases="--save-aliases" in sys.argv)
     print("STATS:", stats)
     sample = next((r for r in recs if r["home_xg"] is not None), None)
     if sample:
@@ -15,62 +15,189 @@ annotate_context(matches, ...) her kaydı yerinde `m["ctx"]` ile zenginleştirir
     "home_n", "away_n",                  # kaç maça bakıldı
     "h2h_gd", "h2h_n",                   # ev-takımı bakışıyla H2H gol-farkı ort. (None=yok)
   }
-Model/backtest bunları predict-zamanı tilt'e çevirir (bkz. backtest_context.py).
+Model/backtest bunları predict-zamanı tilt'e çevirir: apply_tilt (backtest_context taraması ve
+service.py canlı /predict aynı tanımı kullanır).
+
+Akış motoru (ContextState): takım başına sınırlı deque (en uzun pencere kadar) + pencere
+başına koşan toplamlar; çift başına aynı düzen (gol farkı sıralı anahtarın ilk takımı
+bakışıyla tutulur, okurken ev takımına çevrilir). Tek kronolojik geçişte birden çok
+pencere (ör. form 3/5/10, H2H 4/6/10) + üstel ağırlıklı form (yarı ömür maç sayısı
+cinsinden) üretilir; okuma ve güncelleme pencere başına O(1). Durum kalıcıdır: yeni maçlar
+update() ile eklenir, geçmiş yeniden oynatılmaz (canlı servis). Puan / gol farkı tamsayı
+→ ortalamalar eski dilim-toplama yoluyla BİREBİR aynı.
+Ek pencereler features() ile düz anahtarlarla okunur:
+  home_form_pts_{n}, home_form_gd_{n}, home_n_{n} (away_ aynı), h2h_gd_{k}, h2h_n_{k},
+  home_ew_pts_{hl}, home_ew_gd_{hl} (away_ aynı; None = geçmiş yok).
 """
-from collections import defaultdict
+import math
+from collections import deque
+
+MIN_FORM_N = 3   # tilt için gereken min. geçmiş maç
+
+
+def _points(gd):
+    return 3 if gd > 0 else (1 if gd == 0 else 0)
+
+
+class _Window:
+    """Son max(windows) kaydın (puan, gol_farkı) deque'i + pencere başına koşan toplamlar."""
+    __slots__ = ("buf", "sums", "ew")
+
+    def __init__(self, windows, n_ew):
+        self.buf = deque(maxlen=max(windows))
+        self.sums = {w: [0, 0] for w in windows}
+        self.ew = [[0.0, 0.0, 0.0] for _ in range(n_ew)]   # (Σpuan, Σgd, Σağırlık)
 
+    def push(self, pts, gd, decays):
+        buf = self.buf
+        for w, acc in self.sums.items():
+            if len(buf) >= w:          # ekleme sonrası w penceresinden düşen kayıt
+                old = buf[-w]
+                acc[0] -= old[0]
+                acc[1] -= old[1]
+            acc[0] += pts
+            acc[1] += gd
+        buf.append((pts, gd))
+        for e, d in zip(self.ew, decays):
+            e[0] = e[0] * d + pts
+            e[1] = e[1] * d + gd
+            e[2] = e[2] * d + 1.0
 
-def _rate(lst, n):
-    """Son-n kaydın (puan, gol_farkı) ortalaması + sayısı. Boşsa (None,None,0)."""
-    tail = lst[-n:]
-    if not tail:
-        return None, None, 0
-    pts = sum(x[0] for x in tail) / len(tail)
-    gd = sum(x[1] for x in tail) / len(tail)
-    return pts, gd, len(tail)
+    def rate(self, w):
+        """w penceresinin (puan ort., gol farkı ort., sayı). Boşsa (None, None, 0)."""
+        n = min(len(self.buf), w)
+        if not n:
+            return None, None, 0
+        acc = self.sums[w]
+        return acc[0] / n, acc[1] / n, n
 
 
-def annotate_context(matches, form_n=5, h2h_k=6):
+class ContextState:
     """
-    matches: tarihe göre ARTAN sıralı maç listesi (data/features formatı:
-             date, home, away, fthg, ftag). Her kayda m["ctx"] eklenir.
+    Artımlı form / H2H durumu. Takım anahtarı hashable ve kendi içinde sıralanabilir
+    olmalı (ad ya da FotMob id). context() maçtan ÖNCE okunur, update() SONRA çağrılır.
     """
-    ms = sorted(matches, key=lambda m: m["date"])
-    hist = defaultdict(list)       # takım -> kronolojik [(puan, gol_farkı), ...]
-    pair_hist = defaultdict(list)  # (t1,t2) sıralı -> [(ev_takımı, home_gd), ...]
 
-    for m in ms:
-        h, a = m["home"], m["away"]
+    def __init__(self, form_windows=(5,), h2h_windows=(6,), ew_halflives=()):
+        self.form_windows = tuple(sorted(set(form_windows)))
+        self.h2h_windows = tuple(sorted(set(h2h_windows)))
+        self.ew_halflives = tuple(ew_halflives)
+        self._decays = tuple(0.5 ** (1.0 / hl) for hl in self.ew_halflives)
+        self.teams = {}   # takım -> _Window
+        self.pairs = {}   # (t1, t2) sıralı -> _Window (gd t1 bakışıyla; puan alanı kullanılmaz)
+        self.n = 0        # işlenen maç sayısı
 
-        # --- ÖNCE oku (sızıntısız) ---
-        hp, hg, hn = _rate(hist[h], form_n)
-        ap, ag, an = _rate(hist[a], form_n)
-
-        key = tuple(sorted((h, a)))
-        prev = pair_hist[key][-h2h_k:]
-        if prev:
-            # her karşılaşmanın gol-farkını ŞU ANKİ ev-takımı bakışına çevir
-            vals = [(gd if home == h else -gd) for (home, gd) in prev]
-            h2h_gd = sum(vals) / len(vals)
-            h2h_n = len(vals)
-        else:
-            h2h_gd, h2h_n = None, 0
+    def _team(self, t):
+        w = self.teams.get(t)
+        if w is None:
+            w = self.teams[t] = _Window(self.form_windows, len(self._decays))
+        return w
 
-        m["ctx"] = {
+    def _h2h(self, h, a, k):
+        key = (h, a) if h <= a else (a, h)
+        w = self.pairs.get(key)
+        if w is None:
+            return None, 0
+        n = min(len(w.buf), k)
+        if not n:
+            return None, 0
+        gd = w.sums[k][1]   # tamsayı: işaret bölmeden önce (-0.0 çıkmaz)
+        return (gd if key[0] == h else -gd) / n, n
+
+    def context(self, home, away, form_n=5, h2h_k=6):
+        """annotate_context'in ctx dict'i (tek form / H2H penceresi)."""
+        if form_n not in self.form_windows or h2h_k not in self.h2h_windows:
+            raise ValueError(f"pencere durumda yok: form_n={form_n} h2h_k={h2h_k}")
+        empty = (None, None, 0)
+        ht, at = self.teams.get(home), self.teams.get(away)
+        hp, hg, hn = ht.rate(form_n) if ht else empty
+        ap, ag, an = at.rate(form_n) if at else empty
+        h2h_gd, h2h_n = self._h2h(home, away, h2h_k)
+        return {
             "home_form_pts": hp, "away_form_pts": ap,
             "home_form_gd": hg, "away_form_gd": ag,
             "home_n": hn, "away_n": an,
             "h2h_gd": h2h_gd, "h2h_n": h2h_n,
         }
 
-        # --- SONRA güncelle ---
-        gd = m["fthg"] - m["ftag"]
-        ph = 3 if gd > 0 else (1 if gd == 0 else 0)
-        pa = 3 if gd < 0 else (1 if gd == 0 else 0)
-        hist[h].append((ph, gd))
-        hist[a].append((pa, -gd))
-        pair_hist[key].append((h, gd))
+    def features(self, home, away):
+        """Tüm pencereler + üstel form, düz anahtarlı dict."""
+        out = {}
+        for side, t in (("home", home), ("away", away)):
+            w = self.teams.get(t)
+            for n in self.form_windows:
+                out[f"{side}_form_pts_{n}"], out[f"{side}_form_gd_{n}"], out[f"{side}_n_{n}"] = (
+                    w.rate(n) if w else (None, None, 0))
+            for hl, e in zip(self.ew_halflives, w.ew if w else [None] * len(self.ew_halflives)):
+                ok = e is not None and e[2] > 0
+                out[f"{side}_ew_pts_{hl}"] = e[0] / e[2] if ok else None
+                out[f"{side}_ew_gd_{hl}"] = e[1] / e[2] if ok else None
+        for k in self.h2h_windows:
+            out[f"h2h_gd_{k}"], out[f"h2h_n_{k}"] = self._h2h(home, away, k)
+        return out
 
+    def update(self, home, away, fthg, ftag):
+        """Oynanmış maçı duruma ekle (kronolojik sırayla çağrılmalı)."""
+        gd = fthg - ftag
+        self._team(home).push(_points(gd), gd, self._decays)
+        self._team(away).push(_points(-gd), -gd, self._decays)
+        if home <= away:
+            key, pgd = (home, away), gd
+        else:
+            key, pgd = (away, home), -gd
+        w = self.pairs.get(key)
+        if w is None:
+            w = self.pairs[key] = _Window(self.h2h_windows, 0)
+        w.push(0, pgd, ())
+        self.n += 1
+
+
+def apply_tilt(p, ctx, bf, bh):
+    """Baz 1X2 {H, D, A}'ya form / H2H tilt'i: ev/dep e^±tilt, normalize. bf=bh=0 → p aynen.
+    tilt = bf·(ev_form_pts − dep_form_pts)/3 [her iki taraf ≥ MIN_FORM_N] + bh·clamp(h2h_gd/2)."""
+    tilt = 0.0
+    if bf and ctx["home_n"] >= MIN_FORM_N and ctx["away_n"] >= MIN_FORM_N:
+        tilt += bf * (ctx["home_form_pts"] - ctx["away_form_pts"]) / 3.0
+    if bh and ctx["h2h_n"] > 0:
+        tilt += bh * max(-1.0, min(1.0, ctx["h2h_gd"] / 2.0))
+    if tilt == 0.0:
+        return p
+    ph = p["H"] * math.exp(tilt)
+    pa = p["A"] * math.exp(-tilt)
+    pd = p["D"]
+    s = ph + pa + pd
+    return {"H": ph / s, "D": pd / s, "A": pa / s}
+
+
+def _chronological(matches):
+    """Zaten tarihe göre sıralıysa kopyalamadan/sıralamadan döndür."""
+    ms = matches if isinstance(matches, list) else list(matches)
+    if any(ms[i]["date"] > ms[i + 1]["date"] for i in range(len(ms) - 1)):
+        ms = sorted(ms, key=lambda m: m["date"])
+    return ms
+
+
+def annotate_context(matches, form_n=5, h2h_k=6, state=None, extra=False):
+    """
+    matches: maç listesi (data/features formatı: date, home, away, fthg, ftag); sıralı değilse
+             tarihe göre sıralanır. Her kayda m["ctx"] eklenir.
+    state:   ContextState (form_n / h2h_k pencerelerini içermeli); verilirse kaldığı yerden
+             devam eder ve maçlar ona eklenir — matches durumdaki son maçtan sonrası olmalı.
+    extra:   True ise ctx'e features()'ın çok-pencereli anahtarları da eklenir.
+    Sıralı liste döner.
+    """
+    ms = _chronological(matches)
+    if state is None:
+        state = ContextState((form_n,), (h2h_k,))
+    for m in ms:
+        h, a = m["home"], m["away"]
+        # --- ÖNCE oku (sızıntısız) ---
+        ctx = state.context(h, a, form_n, h2h_k)
+        if extra:
+            ctx.update(state.features(h, a))
+        m["ctx"] = ctx
+        # --- SONRA güncelle ---
+        state.update(h, a, m["fthg"], m["ftag"])
     return ms
 
 
@@ -7,19 +7,32 @@ formunu FD-canonical'a indirir) — FD↔Understat alias sözlüğüne dokunmada
 
 read_by_date(gün) o güne geçerli TÜM kulüp ELO'sunu verir (dünya geneli, tüm ligler
 tek çağrıda). Maç tarihlerini haftalık (Pazartesi) kovaya yuvarlayıp o snapshot'ları
-çeker → {grid_monday: {(country, key): elo}}. Maç için: maçtan ÖNCEKİ en yakın
+çeker → {grid_monday: {(country, key): elo}}. Haftalar elostore deposunda (float32) kalır;
+yalnız eksik haftalar sınırlı iş parçacığı havuzuyla çekilir, ELO_FIXTURE_DIR ile yerel
+ClubElo CSV'lerinden çevrimdışı kurulur. Maç için: maçtan ÖNCEKİ en yakın
 Pazartesi snapshot'ı → o haftanın başındaki ELO (o maçın sonucunu içermez → sızıntı yok).
 
 Yalnız yerelde/Hetzner'de (soccerdata TLS). Vercel'de KOŞMAZ → canlıya taşınırsa
 ELO snapshot ayrı tabloya yazılır (bkz. Faz 2 canlı-bağlama).
 """
+import os
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
+from functools import lru_cache
 
-from features import canon
+from data import CACHE_DIR
+from elostore import SnapshotStore
+from features import CANON_CACHE, canon
 
 # FD kodu → ClubElo country
 CC = {"E0": "ENG", "SP1": "ESP", "I1": "ITA", "D1": "GER", "F1": "FRA"}
 
+ELO_SNAP_DIR = os.environ.get("ELO_SNAP_DIR", os.path.join(CACHE_DIR, "clubelo"))
+ELO_FIXTURE_DIR = os.environ.get("ELO_FIXTURE_DIR")  # çevrimdışı: <YYYY-MM-DD>.csv dizini
+ELO_WORKERS = int(os.environ.get("ELO_WORKERS", "4"))
+
 # ClubElo yüzey-formu (canon'lanmış) → FD-canonical hedef (features.canon çıktısıyla aynı olsun)
 _ELO_FIX = {
     "bayern": "bayern munich",
@@ -34,61 +47,146 @@ _ELO_FIX = {
 }
 
 
+@lru_cache(maxsize=CANON_CACHE)
 def elo_key(name: str) -> str:
+    """ClubElo/FD adı → (ülke ile birlikte) snapshot anahtarı. Ad başına bir kez hesaplanır."""
     c = canon(name)
     return _ELO_FIX.get(c, c)
 
 
+def elo_key_stats() -> dict:
+    ci = elo_key.cache_info()
+    return {"hits": ci.hits, "misses": ci.misses, "size": ci.currsize, "max": ci.maxsize}
+
+
 def _monday(d):
     return (d - timedelta(days=d.weekday())).date()
 
 
-def build_snapshots(dates, verbose=True):
-    """
-    dates: datetime listesi. Haftalık (Pazartesi) benzersiz snapshot'ları çeker.
-    Döndürür: (sorted_grid_list, {grid_monday: {(country, key): elo}}).
-    """
+def _rows(df):
+    """ClubElo DataFrame'i → [(ülke, anahtar, elo), ...]; sütun işlemleriyle, iterrows yok.
+    elo_key takım başına değil BENZERSİZ ad başına bir kez koşar."""
+    import pandas as pd
+    df = df.reset_index()
+    df.columns = [str(c).lower() for c in df.columns]
+    if "team" not in df.columns and "club" in df.columns:  # api.clubelo.com CSV başlığı
+        df = df.rename(columns={"club": "team"})
+    elo = pd.to_numeric(df["elo"], errors="coerce")
+    ok = elo.notna() & df["team"].notna() & df["country"].notna()
+    teams = df.loc[ok, "team"].astype(str)
+    keys = teams.map({t: elo_key(t) for t in teams.unique()})
+    return list(zip(df.loc[ok, "country"].astype(str), keys, elo[ok].astype("float32").tolist()))
+
+
+def _fixture_reader(fixture_dir):
+    """Çevrimdışı kaynak: <dizin>/<YYYY-MM-DD>.csv (api.clubelo.com/<tarih> çıktısı)."""
+    import pandas as pd
+
+    def read(day):
+        path = os.path.join(fixture_dir, f"{day.isoformat()}.csv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return pd.read_csv(path)
+    return read
+
+
+def _clubelo_reader():
     import logging
     logging.disable(logging.CRITICAL)
     import soccerdata as sd
 
+    local = threading.local()  # işçi başına bir ClubElo oturumu
+
+    def read(day):
+        if not hasattr(local, "elo"):
+            local.elo = sd.ClubElo()
+        return local.elo.read_by_date(day.isoformat())
+    return read
+
+
+def build_snapshots(dates, verbose=True, workers=None, fixture_dir=None):
+    """
+    dates: datetime listesi. Haftalık (Pazartesi) snapshot'lar ELO_SNAP_DIR deposundan;
+    depoda olmayan haftalar `workers` iş parçacığıyla çekilip depoya eklenir.
+    fixture_dir (ya da ELO_FIXTURE_DIR): soccerdata yerine yerel ClubElo CSV'leri.
+    Döndürür: (sorted_grid_list, {grid_monday: {(country, key): elo}}).
+    """
     grid = sorted({_monday(d) for d in dates})
-    elo = sd.ClubElo()
-    snaps = {}
-    for i, g in enumerate(grid):
-        try:
-            df = elo.read_by_date(g.isoformat()).reset_index()
-        except Exception as e:
-            if verbose:
-                print(f"  [elo] {g} çekilemedi: {e}")
-            continue
-        d = {}
-        for _, r in df.iterrows():
-            try:
-                d[(r["country"], elo_key(r["team"]))] = float(r["elo"])
-            except (TypeError, ValueError, KeyError):
-                continue
-        snaps[g] = d
-        if verbose and (i + 1) % 25 == 0:
-            print(f"  [elo] {i+1}/{len(grid)} snapshot")
+    db = SnapshotStore(ELO_SNAP_DIR)
+    missing = sorted(set(grid) - db.weeks())
+    fixture_dir = fixture_dir or ELO_FIXTURE_DIR
+    if missing:
+        read = _fixture_reader(fixture_dir) if fixture_dir else _clubelo_reader()
+        workers = max(1, min(workers or ELO_WORKERS, len(missing)))
+        if verbose:
+            print(f"[elo] {len(grid) - len(missing)}/{len(grid)} hafta depoda, "
+                  f"{len(missing)} eksik → {workers} işçi")
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clubelo") as ex:
+            futs = {ex.submit(read, g): g for g in missing}
+            for i, fut in enumerate(as_completed(futs), 1):
+                g = futs[fut]
+                try:
+                    fetched[g] = _rows(fut.result())
+                except Exception as e:
+                    if verbose:
+                        print(f"  [elo] {g} çekilemedi: {e}")
+                if verbose and i % 25 == 0:
+                    print(f"  [elo] {i}/{len(missing)} snapshot")
+        db.add(fetched)
+    snaps = db.load(grid)
     if verbose:
         print(f"[elo] {len(snaps)}/{len(grid)} haftalık snapshot hazır")
     return sorted(snaps), snaps
 
 
+class SnapshotIndex:
+    """
+    build_snapshots çıktısı üzerinde nokta-zamanlı arama: Pazartesi ordinal'lerinde bisect
+    (O(log hafta)); takım adı → anahtar elo_key önbelleğinden (canon ad başına bir kez).
+    get() tek maç, lookup() maç listesi için (ev ELO'ları, dep ELO'ları) — eksik = None.
+    """
+
+    def __init__(self, grid, snaps):
+        self.grid = list(grid)
+        self._ords = [g.toordinal() for g in self.grid]
+        self._snaps = [snaps.get(g, {}) for g in self.grid]
+
+    key = staticmethod(elo_key)
+
+    def snapshot(self, date):
+        """date'ten ÖNCEKİ en yakın Pazartesi snapshot'ı (yoksa None)."""
+        i = bisect_right(self._ords, _monday(date).toordinal()) - 1
+        return self._snaps[i] if i >= 0 else None
+
+    def get(self, country, fd_name, date):
+        snap = self.snapshot(date)
+        return None if snap is None else snap.get((country, self.key(fd_name)))
+
+    def lookup(self, matches, country):
+        """Maç başına (ev, dep) ELO, tek geçişte; snapshot aynı gün için bir kez aranır."""
+        home, away = [], []
+        last_day = snap = None
+        for m in matches:
+            day = m["date"].toordinal()
+            if day != last_day:
+                snap, last_day = self.snapshot(m["date"]), day
+            if snap is None:
+                home.append(None)
+                away.append(None)
+                continue
+            home.append(snap.get((country, self.key(m["home"]))))
+            away.append(snap.get((country, self.key(m["away"]))))
+        return home, away
+
+
 def elo_of(grid, snaps, country, fd_name, date):
-    """Maçtan ÖNCEKİ en yakın Pazartesi snapshot'ta takımın ELO'su (yoksa None)."""
-    target = _monday(date)
-    # target'tan büyük olmayan en yakın grid (grid sıralı) — küçük veri, lineer tara yeterli
-    best = None
-    for g in grid:
-        if g <= target:
-            best = g
-        else:
-            break
-    if best is None:
+    """Maçtan ÖNCEKİ en yakın Pazartesi snapshot'ta takımın ELO'su (yoksa None).
+    Çok sayıda arama için SnapshotIndex kullan."""
+    i = bisect_right(grid, _monday(date)) - 1  # grid sıralı
+    if i < 0:
         return None
-    return snaps.get(best, {}).get((country, elo_key(fd_name)))
+    return snaps.get(grid[i], {}).get((country, elo_key(fd_name)))
 
 
 def coverage(recs, fd_code, grid, snaps):
@@ -96,10 +194,8 @@ def coverage(recs, fd_code, grid, snaps):
     country = CC[fd_code]
     tot = hit = 0
     miss = set()
-    for m in recs:
+    for m, eh, ea in zip(recs, *SnapshotIndex(grid, snaps).lookup(recs, country)):
         tot += 1
-        eh = elo_of(grid, snaps, country, m["home"], m["date"])
-        ea = elo_of(grid, snaps, country, m["away"], m["date"])
         if eh is not None and ea is not None:
             hit += 1
         else:
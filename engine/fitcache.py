@@ -0,0 +1,127 @@
+"""
+Sınırlı fit önbelleği — service._fit_cache için LRU + azami yaş + bayt bütçesi.
+
+Düz dict (league_id, ref_ordinal) anahtarıyla hiç boşalmıyordu: her gün lig başına yeni
+bir ordinal, /predict keyfi ref_date kabul ediyor → haftalarca açık süreç sınırsız büyür.
+Burada:
+  - en fazla FIT_CACHE_MAX_ENTRIES kayıt ve ~FIT_CACHE_MAX_MB yaklaşık bellek
+    (sınır aşılınca en uzun süredir kullanılmayan atılır);
+  - FIT_CACHE_MAX_AGE saniyeden eski kayıt okunurken atılır (0 = kapalı);
+  - nearest(): tam ordinal yoksa aynı ligin N gün içindeki en yakın ÖNCEKİ fit'i
+    (servis FIT_REUSE_DAYS > 0 ise kullanır);
+  - hit / miss / eviction / reuse sayaçları → /status.
+Yeni küme fresh() ile kurulur: ayar ve sayaçlar eski kümeyle paylaşılır.
+Saf stdlib.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+FIT_CACHE_MAX_ENTRIES = int(os.environ.get("FIT_CACHE_MAX_ENTRIES", "512"))
+FIT_CACHE_MAX_MB = float(os.environ.get("FIT_CACHE_MAX_MB", "64"))
+FIT_CACHE_MAX_AGE = int(os.environ.get("FIT_CACHE_MAX_AGE", str(2 * 86400)))  # saniye
+
+_FLOAT = sys.getsizeof(1.0)
+
+
+def model_bytes(mdl) -> int:
+    """Fit'li modelin yaklaşık bellek ayak izi (A/D dict'leri + takım kümesi + anahtar dizgeleri)."""
+    if mdl is None:
+        return 64
+    n = len(mdl["A"])
+    key_bytes = sum(sys.getsizeof(t) for t in mdl["A"])
+    return (sys.getsizeof(mdl) + 2 * sys.getsizeof(mdl["A"]) + sys.getsizeof(mdl["teams"])
+            + key_bytes + 2 * n * _FLOAT)
+
+
+class FitCache:
+    """(league_id, ref_ord) → model | None. İş parçacığı güvenli LRU."""
+
+    def __init__(self, max_entries=FIT_CACHE_MAX_ENTRIES, max_bytes=int(FIT_CACHE_MAX_MB * 2 ** 20),
+                 max_age=FIT_CACHE_MAX_AGE, stats=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._d = OrderedDict()   # key -> (model, bayt, eklenme zamanı)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = stats if stats is not None else {"hits": 0, "misses": 0, "evictions": 0,
+                                                       "reuses": 0}
+
+    def fresh(self):
+        """Aynı ayar ve sayaçlarla boş küme (atomik değişim için)."""
+        return FitCache(self.max_entries, self.max_bytes, self.max_age, self._stats)
+
+    def _expired(self, ts, now):
+        return self.max_age > 0 and now - ts > self.max_age
+
+    def _drop(self, key):
+        _, nb, _ = self._d.pop(key)
+        self._bytes -= nb
+        self._stats["evictions"] += 1
+
+    def lookup(self, key):
+        """(bulundu mu, model). Bulunursa en yeni kullanılan olur; süresi geçmişse atılır."""
+        with self._lock:
+            e = self._d.get(key)
+            if e is not None and self._expired(e[2], time.time()):
+                self._drop(key)
+                e = None
+            if e is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._d.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, e[0]
+
+    def put(self, key, mdl):
+        with self._lock:
+            if key in self._d:
+                self._bytes -= self._d.pop(key)[1]
+            nb = model_bytes(mdl)
+            self._d[key] = (mdl, nb, time.time())
+            self._bytes += nb
+            while self._d and (len(self._d) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._d))
+                if oldest == key:
+                    break  # tek kayıt bütçeden büyük: yine de tut
+                self._drop(oldest)
+
+    def nearest(self, league_id, ref_ord, max_days=None, reuse=False):
+        """Ligin ref_ord'a eşit/önceki en yakın fit'li modeli (en çok max_days geride) ya da None.
+        reuse=True: tam ordinalin yerine kullanıldı → 'reuses' sayacı + LRU tazeleme."""
+        with self._lock:
+            now = time.time()
+            best = None
+            for k, (mdl, _, ts) in self._d.items():
+                if (k[0] != league_id or mdl is None or k[1] > ref_ord
+                        or self._expired(ts, now)
+                        or (max_days is not None and ref_ord - k[1] > max_days)):
+                    continue
+                if best is None or k[1] > best[1]:
+                    best = k
+            if best is None:
+                return None
+            if reuse:
+                self._d.move_to_end(best)
+                self._stats["reuses"] += 1
+            return self._d[best][0]
+
+    def __len__(self):
+        return len(self._d)
+
+    def values(self):
+        with self._lock:
+            return [e[0] for e in self._d.values()]
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            look = s["hits"] + s["misses"]
+            s.update(entries=len(self._d), approx_mb=round(self._bytes / 2 ** 20, 2),
+                     hit_rate=round(s["hits"] / look, 4) if look else None,
+                     max_entries=self.max_entries, max_mb=round(self.max_bytes / 2 ** 20, 2),
+                     max_age_s=self.max_age)
+            return s
@@ -0,0 +1,148 @@
+"""
+MatchFrame — maç listesinin sütunlu gösterimi (list[dict] yerine `array` tamponları).
+
+data.load_matches / features.load_features / ResultStore.load_for_fit maç başına ~1KB'lık
+dict (datetime + isim dizgeleri) üretiyor; fit'ler ve backtest'ler ordinal ve takım kümesini
+bunlardan tekrar tekrar türetiyor. Burada maç başına ~60 bayt:
+
+    ordinal  int32   tarih (date.toordinal — gün; pencere ve ağırlıklar bununla)
+    ts       int64   ordinal·86400 + gün içi saniye (saat yoksa gece yarısı)
+    home/away int32  takım kodu → frame.teams[kod] (sözlük SIRALI: kod sırası = isim sırası)
+    fthg/ftag int8   gol
+    season   int16   sezon kodu → frame.seasons[kod]
+    home_xg/away_xg, odds_home/draw/away  float64 (eksik = NaN)
+
+Satırlar ts'ye göre sıralı (eşitlerde giriş sırası korunur) → between()/before() bisect
+ile KOPYASIZ dilim döndürür (memoryview). np(ad) aynı tamponu numpy dizisi olarak verir.
+from_records / to_records mevcut dict listeleriyle köprüdür (sources gibi sayısal olmayan
+alanlar taşınmaz). model.fit / model_xg.fit MatchFrame'i doğrudan kabul eder.
+Saf stdlib (numpy yalnız np() için).
+"""
+import math
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+NAN = float("nan")
+COLUMNS = {
+    "ordinal": "i", "ts": "q", "home": "i", "away": "i", "fthg": "b", "ftag": "b", "season": "h",
+    "home_xg": "d", "away_xg": "d", "odds_home": "d", "odds_draw": "d", "odds_away": "d",
+}
+_OPTIONAL = {"xg": ("home_xg", "away_xg"), "odds": ("odds_home", "odds_draw", "odds_away")}
+
+
+def _ts(d) -> int:
+    """ordinal·86400 + gün içi saniye (date'te 0)."""
+    return (d.toordinal() * 86400 + getattr(d, "hour", 0) * 3600
+            + getattr(d, "minute", 0) * 60 + getattr(d, "second", 0))
+
+
+def _num(v):
+    return NAN if v is None else float(v)
+
+
+def _opt(v):
+    return None if math.isnan(v) else v
+
+
+class MatchFrame:
+    """Sütunlu, tarihe göre sıralı maç çerçevesi. Dilimler tamponları paylaşır."""
+
+    def __init__(self, cols: dict, teams: list, seasons: list, fields=frozenset()):
+        self._cols = {k: memoryview(v) if isinstance(v, array) else v for k, v in cols.items()}
+        self.teams = teams
+        self.seasons = seasons
+        self.fields = frozenset(fields)  # kaynakta bulunan opsiyonel gruplar: xg / odds / ftr
+
+    # ---- kurulum / köprüler ----
+    @classmethod
+    def from_records(cls, records, teams=None):
+        """dict listesinden (date, home, away, fthg, ftag [+ xG, oranlar, season])."""
+        recs = sorted(records, key=lambda m: _ts(m["date"]))
+        teams = teams or sorted({m["home"] for m in recs} | {m["away"] for m in recs})
+        code = {t: i for i, t in enumerate(teams)}
+        seasons = sorted({m.get("season", "") for m in recs})
+        scode = {s: i for i, s in enumerate(seasons)}
+        fields = {g for g, keys in _OPTIONAL.items() if any(keys[0] in m for m in recs)}
+        if any("ftr" in m for m in recs):
+            fields.add("ftr")
+        cols = {k: array(t) for k, t in COLUMNS.items()}
+        for m in recs:
+            cols["ordinal"].append(m["date"].toordinal())
+            cols["ts"].append(_ts(m["date"]))
+            cols["home"].append(code[m["home"]])
+            cols["away"].append(code[m["away"]])
+            cols["fthg"].append(m["fthg"])
+            cols["ftag"].append(m["ftag"])
+            cols["season"].append(scode[m.get("season", "")])
+            for k in ("home_xg", "away_xg", "odds_home", "odds_draw", "odds_away"):
+                cols[k].append(_num(m.get(k)))
+        return cls(cols, teams, seasons, fields)
+
+    def to_records(self):
+        """dict listesine geri (date = ts'den datetime; saat yoksa gece yarısı)."""
+        c = self._cols
+        out = []
+        sec = timedelta(seconds=1)
+        for k in range(len(self)):
+            hg, ag = c["fthg"][k], c["ftag"][k]
+            r = {
+                "date": datetime.fromordinal(c["ordinal"][k]) + sec * (c["ts"][k] % 86400),
+                "season": self.seasons[c["season"][k]],
+                "home": self.teams[c["home"][k]],
+                "away": self.teams[c["away"][k]],
+                "fthg": hg,
+                "ftag": ag,
+            }
+            if "ftr" in self.fields:
+                r["ftr"] = "H" if hg > ag else "A" if hg < ag else "D"
+            for g in ("odds", "xg"):
+                if g in self.fields:
+                    for key in _OPTIONAL[g]:
+                        r[key] = _opt(c[key][k])
+            out.append(r)
+        return out
+
+    # ---- erişim ----
+    def __len__(self):
+        return len(self._cols["ordinal"])
+
+    def __getattr__(self, name):
+        cols = self.__dict__.get("_cols")
+        if cols is not None and name in cols:
+            return cols[name]
+        raise AttributeError(name)
+
+    def __getitem__(self, sl):
+        if not isinstance(sl, slice):
+            raise TypeError("MatchFrame yalnız dilimle indekslenir")
+        return MatchFrame({k: v[sl] for k, v in self._cols.items()},
+                          self.teams, self.seasons, self.fields)
+
+    def between(self, start_ord: int, end_ord: int):
+        """start_ord <= ordinal < end_ord satırları (kopyasız)."""
+        o = self._cols["ordinal"]
+        return self[bisect_left(o, start_ord):bisect_left(o, end_ord)]
+
+    def before(self, ref_date, window_days=None):
+        """fit penceresi: date < ref_date (saniye çözünürlüğü; dict yoluyla aynı kesim) ve
+        window_days varsa ordinal >= ref_date.toordinal() − window_days olan maçlar."""
+        ref = ref_date.toordinal()
+        lo = bisect_left(self._cols["ordinal"], ref - window_days) if window_days else 0
+        return self[lo:max(lo, bisect_left(self._cols["ts"], _ts(ref_date)))]
+
+    def home_names(self):
+        t = self.teams
+        return [t[c] for c in self._cols["home"]]
+
+    def away_names(self):
+        t = self.teams
+        return [t[c] for c in self._cols["away"]]
+
+    def np(self, name):
+        """Sütunun numpy görünümü (kopyasız)."""
+        import numpy as np
+        return np.frombuffer(self._cols[name], dtype=self._cols[name].format)
+
+    def nbytes(self) -> int:
+        return sum(v.nbytes for v in self._cols.values())
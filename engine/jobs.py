@@ -0,0 +1,91 @@
+"""
+Arka plan işleri — admin uçları (/update, /backfill) HTTP isteğini dakikalarca tutmasın.
+
+İş = (1) FotMob taraması → (2) depo yeniden yükleme → (3) MIN_LEAGUE_MATCHES üstündeki
+her ligi bir işçi havuzunda fit → (4) yeni model setini TEK atamayla devreye alma.
+Uç hemen {"job_id"} döner; n8n GET /jobs/{id} ile ilerlemeyi yoklar.
+
+fit_league süreç havuzunda (spawn) koşar → yalnız model.py'yi içe aktarır, servis
+modülünü değil. Saf stdlib.
+"""
+import threading
+import traceback
+import uuid
+from datetime import datetime, timezone
+
+import model as M
+
+MAX_JOBS = 50  # bellekte tutulan son iş sayısı
+
+
+def fit_league(league_id, matches, ref_ord, init=None):
+    """İşçi süreçte tek lig fit'i → (league_id, model | None)."""
+    ref_date = datetime.fromordinal(ref_ord)
+    return league_id, M.fit(matches, ref_date, tol=M.FIT_TOL, init=init)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "queued"      # queued | running | done | failed
+        self.progress = {"phase": "queued"}
+        self.result = None
+        self.error = None
+        self.created_at = _now()
+        self.finished_at = None
+
+    def update(self, **kw):
+        self.progress.update(kw)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id, "kind": self.kind, "status": self.status,
+            "progress": dict(self.progress), "result": self.result, "error": self.error,
+            "created_at": self.created_at, "finished_at": self.finished_at,
+        }
+
+
+class JobRunner:
+    """İşleri arka plan iş parçacığında koşar; aynı türden tek iş aynı anda çalışır."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn):
+        """fn(job) → result. Aynı türde koşan iş varsa YENİSİ açılmaz, o döner."""
+        with self._lock:
+            for j in self._jobs.values():
+                if j.kind == kind and j.status in ("queued", "running"):
+                    return j, False
+            job = Job(kind)
+            self._jobs[job.id] = job
+            if len(self._jobs) > MAX_JOBS:
+                for old in list(self._jobs)[:len(self._jobs) - MAX_JOBS]:
+                    if self._jobs[old].status in ("done", "failed"):
+                        del self._jobs[old]
+        threading.Thread(target=self._run, args=(job, fn), daemon=True,
+                         name=f"job-{kind}-{job.id}").start()
+        return job, True
+
+    def _run(self, job, fn):
+        job.status = "running"
+        try:
+            job.result = fn(job)
+            job.status = "done"
+            job.update(phase="done")
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            job.update(phase="failed")
+            traceback.print_exc()
+        finally:
+            job.finished_at = _now()
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
@@ -0,0 +1,183 @@
+"""
+Ortak backtest metrikleri — 1X2 isabet, Brier, log-loss, 10-bin ECE, EV-eşikli ROI.
+
+backtest / backtest_xg / backtest_elo / backtest_context aynı döngüyü tahmin başına dict
+erişimiyle ayrı ayrı yazıyordu; beta/λ taramaları da aynı tahminleri 8-15 kez geziyordu.
+Burada girdi diziler:
+
+    p     N×3  (H, D, A) olasılık — ya da B×N×3: B ayar (λ / tilt) tek çağrıda
+    y     N    gerçekleşen sonuç indeksi (0=H, 1=D, 2=A)
+    odds  N×3  ondalık oran (eksik = 0 / NaN → o maçta bahis ve bahisçi kıyası yok)
+
+score() tek ayar için dict, score_batch() B ayar için dict listesi (tablo) döndürür; yazdırma
+yok. blend() / tilt() B boyutlu aday kümesini kurar. Tanımlar eski döngülerle aynı:
+seçim = argmax (eşitlikte H>D>A sırası), log-loss p'yi 1e-9'da keser, ECE bin merkezine
+göre, bahis = p·oran − 1 > eşik (1 birim). numpy gerekir; yoksa score() saf Python'a düşer.
+"""
+import math
+
+OUTCOMES = ("H", "D", "A")
+OUTCOME_INDEX = {o: i for i, o in enumerate(OUTCOMES)}
+BINS = 10
+
+
+def arrays(preds, key="p"):
+    """backtest tahmin listesinden ({key: {H,D,A}, actual, odds}) → (p, y, odds) dizileri."""
+    import numpy as np
+    p = np.array([[e[key][o] for o in OUTCOMES] for e in preds], dtype=float).reshape(-1, 3)
+    y = np.array([OUTCOME_INDEX[e["actual"]] for e in preds], dtype=np.intp)
+    odds = np.array([[e["odds"][o] or 0.0 for o in OUTCOMES] for e in preds],
+                    dtype=float).reshape(-1, 3)
+    return p, y, odds
+
+
+def optional(preds, key, base="p"):
+    """İsteğe bağlı ikinci olasılık (ör. p_elo): (q N×3, var mı N). Eksik maçta base kopyalanır."""
+    import numpy as np
+    q = np.array([[(e[key] or e[base])[o] for o in OUTCOMES] for e in preds],
+                 dtype=float).reshape(-1, 3)
+    has = np.array([e[key] is not None for e in preds], dtype=bool)
+    return q, has
+
+
+def blend(p, q, lams, has_q=None):
+    """(1-λ)·p + λ·q, λ başına bir satır → B×N×3. has_q=False olan maçta p aynen kalır."""
+    import numpy as np
+    lam = np.asarray(lams, dtype=float)[:, None, None]
+    out = (1.0 - lam) * p[None] + lam * q[None]
+    if has_q is not None:
+        out = np.where(has_q[None, :, None], out, p[None])
+    return np.where(lam == 0.0, p[None], out)  # λ=0 → baz BİREBİR
+
+
+def tilt(p, t):
+    """Ev/dep olasılığını e^±t ile kaydır, normalize et. t: B×N (ya da N). t=0 → p aynen."""
+    import numpy as np
+    t = np.asarray(t, dtype=float)
+    ph = p[..., 0] * np.exp(t)
+    pa = p[..., 2] * np.exp(-t)
+    pd = np.broadcast_to(p[..., 1], ph.shape)
+    s = ph + pa + pd
+    out = np.stack([ph / s, pd / s, pa / s], axis=-1)
+    return np.where((t == 0.0)[..., None], p, out)
+
+
+def score(p, y, odds=None, ev_threshold=0.05):
+    """Tek ayar (p N×3) için metrik dict'i; boş girdide None."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return _score_py(p, y, odds, ev_threshold)
+    return score_batch(p, y, odds, ev_threshold)[0]
+
+
+def score_batch(p, y, odds=None, ev_threshold=0.05):
+    """p: N×3 ya da B×N×3. Ayar başına metrik dict'i listesi (B uzunlukta; boşsa [None])."""
+    import numpy as np
+    p = np.asarray(p, dtype=float)
+    if p.ndim < 3:
+        p = p.reshape(1, -1, 3)  # N×3 ya da boş liste ([] → 1×0×3)
+    y = np.asarray(y, dtype=np.intp)
+    b, n = p.shape[0], p.shape[1]
+    if n == 0:
+        return [None] * b
+    rows = np.arange(n)
+    onehot = np.zeros((n, 3))
+    onehot[rows, y] = 1.0
+
+    pick = p.argmax(axis=2)                       # B×N
+    hit = pick == y[None]
+    conf = p.max(axis=2)
+    brier = ((p - onehot[None]) ** 2).sum(axis=2).sum(axis=1) / n
+    logloss = -np.log(np.maximum(p[:, rows, y], 1e-9)).sum(axis=1) / n
+
+    # kalibrasyon: seçilen sonucun güveni vs isabet, bin merkezine göre
+    bi = np.minimum(BINS - 1, (conf * BINS).astype(np.intp))
+    flat = bi + BINS * np.arange(b)[:, None]
+    cnt = np.bincount(flat.ravel(), minlength=b * BINS).reshape(b, BINS)
+    corr = np.bincount(flat.ravel(), hit.ravel().astype(float),
+                       minlength=b * BINS).reshape(b, BINS)
+    centers = (np.arange(BINS) + 0.5) / BINS
+    gap = np.abs(np.divide(corr, cnt, out=np.zeros_like(corr), where=cnt > 0) - centers)
+    ece = (cnt * gap).sum(axis=1) / n
+
+    book = np.zeros(b)
+    bets = np.zeros(b, dtype=int)
+    wins = np.zeros(b, dtype=int)
+    profit = np.zeros(b)
+    if odds is not None:
+        od = np.nan_to_num(np.asarray(odds, dtype=float))
+        valid = (od > 0).all(axis=1)
+        imp = np.divide(1.0, od, out=np.zeros_like(od), where=od > 0)
+        book[:] = (valid & (imp.argmax(axis=1) == y)).sum()
+        bet = ((p * od[None] - 1.0) > ev_threshold) & valid[None, :, None]   # B×N×3
+        won = bet & onehot[None].astype(bool)
+        bets = bet.sum(axis=(1, 2))
+        wins = won.sum(axis=(1, 2))
+        profit = (won * (od[None] - 1.0)).sum(axis=(1, 2)) - (bets - wins)
+
+    out = []
+    for k in range(b):
+        nb = int(bets[k])
+        out.append({
+            "n": n, "acc": float(hit[k].sum()) / n * 100, "book_acc": float(book[k]) / n * 100,
+            "brier": float(brier[k]), "logloss": float(logloss[k]), "ece": float(ece[k]) * 100,
+            "bets": nb, "bet_wins": int(wins[k]), "profit": float(profit[k]),
+            "roi": float(profit[k]) / nb * 100 if nb else 0.0,
+            "bet_hit": int(wins[k]) / nb * 100 if nb else 0.0,
+        })
+    return out
+
+
+def _score_py(p, y, odds, ev_threshold):
+    """numpy'siz yol (backtest.py saf Python kalır): aynı tanımlar, maç başına döngü."""
+    n = correct = book_correct = bets = bet_wins = 0
+    brier_sum = logloss_sum = profit = 0.0
+    cal = [[0, 0.0] for _ in range(BINS)]
+    for k, (pk, yk) in enumerate(zip(p, y)):
+        n += 1
+        pick = max(range(3), key=lambda i: pk[i])
+        conf = pk[pick]
+        correct += pick == yk
+        bi = min(BINS - 1, int(conf * BINS))
+        cal[bi][0] += 1
+        cal[bi][1] += 1.0 if pick == yk else 0.0
+        brier_sum += sum((pk[i] - (1.0 if i == yk else 0.0)) ** 2 for i in range(3))
+        logloss_sum += -math.log(max(pk[yk], 1e-9))
+        od = odds[k] if odds is not None else None
+        if od is not None and all(o and o > 0 for o in od):
+            if max(range(3), key=lambda i: 1 / od[i]) == yk:
+                book_correct += 1
+            for i in range(3):
+                if pk[i] * od[i] - 1.0 > ev_threshold:
+                    bets += 1
+                    if i == yk:
+                        profit += od[i] - 1.0
+                        bet_wins += 1
+                    else:
+                        profit -= 1.0
+    if n == 0:
+        return None
+    ece = sum(c * abs(corr / c - (b + 0.5) / BINS) for b, (c, corr) in enumerate(cal) if c) / n
+    return {"n": n, "acc": correct / n * 100, "book_acc": book_correct / n * 100,
+            "brier": brier_sum / n, "logloss": logloss_sum / n, "ece": ece * 100,
+            "bets": bets, "bet_wins": bet_wins, "profit": profit,
+            "roi": profit / bets * 100 if bets else 0.0,
+            "bet_hit": bet_wins / bets * 100 if bets else 0.0}
+
+
+if __name__ == "__main__":
+    # Sağlama: boş girdi her yolda None (backtest'lerin "maç yok" kolu), numpy == saf Python.
+    assert score([], [], []) is None
+    assert score_batch([], [], []) == [None]
+    assert score_batch([[]] * 2, [], None) == [None]
+    assert _score_py([], [], None, 0.05) is None
+    import random
+    rnd = random.Random(0)
+    p = [[a / (a + b + c), b / (a + b + c), c / (a + b + c)]
+         for a, b, c in ((rnd.random(), rnd.random(), rnd.random()) for _ in range(500))]
+    y = [rnd.randrange(3) for _ in p]
+    odds = [[1 / q + rnd.uniform(-0.3, 0.6) for q in pk] for pk in p]
+    a, b = score(p, y, odds), _score_py(p, y, odds, 0.05)
+    assert all(abs(a[k] - b[k]) < 1e-9 for k in a), (a, b)
+    print("[metrics] sağlama ✓ (boş girdi + numpy/saf Python eşitliği)")
@@ -1,13 +1,29 @@
 """
 Dixon-Coles-lite gol modeli (saf Python, bağımlılık yok).
 - Zaman-ağırlıklı Poisson MLE (sabit-nokta iterasyonu) ile takım atak/defans gücü.
+  Opsiyonel numpy dizi motoru (FIT_BACKEND=numpy) — aynı {A,D,H,base}, çok daha hızlı.
 - Dixon-Coles düşük-skor düzeltmesi (rho).
-- Skor matrisinden 1X2 / Üst-Alt 2.5 / KG olasılıkları.
+- Skor matrisinden 1X2 / Üst-Alt 2.5 / KG olasılıkları; istenirse aynı matristen tam
+  market seti (toplam gol merdiveni, Asya handikapı, çifte şans, DNB, takım golleri, skor).
 """
 import math
+import os
+
+from frame import MatchFrame
 
 MAX_GOALS = 10
 RHO = -0.10  # Dixon-Coles düşük skor düzeltmesi
+FIT_BACKEND = os.environ.get("FIT_BACKEND", "py")  # "py" | "numpy" (opt-in dizi motoru)
+# Market varsayılanları (predict(..., markets=...)); çizgiler ev sahibi perspektifinden
+TOTAL_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+AH_LINES = (-2.5, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 2.5)
+TEAM_TOTAL_LINES = (0.5, 1.5, 2.5)
+CORRECT_SCORE_TOP = 10
+MARKETS = {
+    "totals": TOTAL_LINES, "ah": AH_LINES, "double_chance": None, "dnb": None,
+    "team_totals": TEAM_TOTAL_LINES, "correct_score": CORRECT_SCORE_TOP,
+}
+FIT_TOL = 1e-5  # warm-start fit'lerde erken durma: maks. göreli parametre değişimi (olasılık farkı ~1e-5)
 
 
 def _pois(k, lam):
@@ -16,8 +32,21 @@ def _pois(k, lam):
     return math.exp(-lam) * (lam ** k) / math.factorial(k)
 
 
-def fit(matches, ref_date, half_life_days=180, window_days=540, iters=25, min_matches=120):
-    """ref_date'ten ÖNCEKİ maçlarla zaman-ağırlıklı Poisson MLE."""
+def fit(matches, ref_date, half_life_days=180, window_days=540, iters=25, min_matches=120,
+        backend=None, tol=0.0, init=None):
+    """ref_date'ten ÖNCEKİ maçlarla zaman-ağırlıklı Poisson MLE.
+    backend: "py" (varsayılan, saf Python) | "numpy" (dizi motoru, aynı sonuç ~1e-12).
+    tol>0: maks. göreli parametre değişimi tol'un altına inince dur (iters = üst sınır).
+    init: önceki fit edilmiş model — A/D/H/base oradan başlar (warm start).
+    matches bir frame.MatchFrame de olabilir (pencere kopyasız dilimlenir, aynı sonuç)."""
+    if isinstance(matches, MatchFrame):
+        train = matches.before(ref_date, window_days)
+        if len(train) < min_matches:
+            return None
+        w = decay_weights(train.ordinal, ref_date.toordinal(), half_life_days)
+        tgt = list(zip(train.fthg, train.ftag))
+        return solve_frame(train, w, tgt, iters=iters, backend=backend, tol=tol, init=init)
+
     train = [m for m in matches if m["date"] < ref_date]
     if window_days:
         cutoff = ref_date.toordinal() - window_days
@@ -25,24 +54,108 @@ def fit(matches, ref_date, half_life_days=180, window_days=540, iters=25, min_ma
     if len(train) < min_matches:
         return None
 
-    teams = sorted({m["home"] for m in train} | {m["away"] for m in train})
-    A = {t: 1.0 for t in teams}   # atak
-    D = {t: 1.0 for t in teams}   # defans
-    H = 1.35                      # ev avantajı (gol çarpanı)
-    base = 1.3                    # lig taban gol
-
     ln2 = math.log(2.0)
     w = []
     for m in train:
         age = ref_date.toordinal() - m["date"].toordinal()
         w.append(math.exp(-ln2 * age / half_life_days))
+    tgt = [(m["fthg"], m["ftag"]) for m in train]
+    return solve(train, w, tgt, iters=iters, backend=backend, tol=tol, init=init)
+
+
+def decay_weights(ordinals, ref_ord, half_life_days):
+    """Üstel zaman ağırlığı 2^(-(ref - gün)/yarı_ömür) — fit() ile aynı aritmetik."""
+    ln2 = math.log(2.0)
+    return [math.exp(-ln2 * (ref_ord - o) / half_life_days) for o in ordinals]
+
+
+def solve(train, w, tgt, iters=25, backend=None, tol=0.0, init=None):
+    """
+    Sabit-nokta iterasyonu: ağırlık (w) ve hedef (tgt=(ev, dep) gol/harman) listeleriyle
+    {A, D, H, base, teams, iters, residual} döndürür. fit() ve model_xg.fit() ortak çekirdeği.
+    iters = koşulan iterasyon, residual = son iterasyondaki maks. göreli parametre değişimi.
+    """
+    hs = [m["home"] for m in train]
+    as_ = [m["away"] for m in train]
+    return _solve(hs, as_, w, tgt, iters, backend, tol, init)
+
+
+def solve_many(train, w, tgts, iters=25, backend=None, tol=0.0, inits=None):
+    """
+    Aynı pencere + ağırlıklarla birden çok hedef kümesi (ör. xg_weight başına harman) için
+    solve(): takım listesi / indeks dizileri / ağırlık vektörü bir kez kurulur, hedef başına
+    yalnız iterasyon koşar. tgts[i] → döndürülen listenin i. modeli; inits[i] warm start.
+    train bir MatchFrame de olabilir.
+    """
+    if isinstance(train, MatchFrame):
+        hs, as_ = train.home_names(), train.away_names()
+    else:
+        hs = [m["home"] for m in train]
+        as_ = [m["away"] for m in train]
+    teams = sorted(set(hs) | set(as_))
+    backend = backend or FIT_BACKEND
+    if backend not in ("py", "numpy"):
+        raise ValueError(f"bilinmeyen fit backend: {backend!r} (py | numpy)")
+    shared = _np_index(hs, as_, teams, w) if backend == "numpy" else None
+    out = []
+    for tgt, init in zip(tgts, inits or [None] * len(tgts)):
+        start = _start_params(teams, init)
+        if shared is not None:
+            A, D, H, base, n_it, resid = _solve_np(hs, as_, teams, w, tgt, iters, tol, start,
+                                                   shared)
+        else:
+            A, D, H, base, n_it, resid = _solve_py(hs, as_, teams, w, tgt, iters, tol, start)
+        out.append({"A": A, "D": D, "H": H, "base": base, "teams": set(teams),
+                    "iters": n_it, "residual": resid})
+    return out
 
+
+def solve_frame(frame, w, tgt, iters=25, backend=None, tol=0.0, init=None):
+    """solve()'un MatchFrame sürümü (takım adları sözlükten, dict kurulmaz)."""
+    return _solve(frame.home_names(), frame.away_names(), w, tgt, iters, backend, tol, init)
+
+
+def _solve(hs, as_, w, tgt, iters, backend, tol, init):
+    teams = sorted(set(hs) | set(as_))
+    start = _start_params(teams, init)
+    backend = backend or FIT_BACKEND
+    if backend == "numpy":
+        A, D, H, base, n_it, resid = _solve_np(hs, as_, teams, w, tgt, iters, tol, start)
+    elif backend == "py":
+        A, D, H, base, n_it, resid = _solve_py(hs, as_, teams, w, tgt, iters, tol, start)
+    else:
+        raise ValueError(f"bilinmeyen fit backend: {backend!r} (py | numpy)")
+    return {"A": A, "D": D, "H": H, "base": base, "teams": set(teams),
+            "iters": n_it, "residual": resid}
+
+
+def _start_params(teams, init):
+    """Başlangıç (A, D, H, base): soğuk (1, 1, 1.35, 1.3) ya da önceki modelden warm start.
+    Önceki modelde olmayan (yeni) takım 1.0'dan başlar."""
+    if not init:
+        return {t: 1.0 for t in teams}, {t: 1.0 for t in teams}, 1.35, 1.3
+    A0, D0 = init["A"], init["D"]
+    return ({t: A0.get(t, 1.0) for t in teams}, {t: D0.get(t, 1.0) for t in teams},
+            init["H"], init["base"])
+
+
+def _rel_change(new, old):
+    return abs(new - old) / abs(old) if old else abs(new - old)
+
+
+def _solve_py(hs, as_, teams, w, tgt, iters, tol, start):
+    # atak, defans, ev avantajı (gol çarpanı), lig taban gol — _start_params yeni dict verir
+    A, D, H, base = start
+    n_it, resid = 0, float("inf")
     for _ in range(iters):
+        A_old, D_old, H_old, base_old = dict(A), dict(D), H, base
         # base
         num = den = 0.0
-        for k, m in enumerate(train):
-            num += w[k] * (m["fthg"] + m["ftag"])
-            den += w[k] * (A[m["home"]] * D[m["away"]] * H + A[m["away"]] * D[m["home"]])
+        for k, h in enumerate(hs):
+            a = as_[k]
+            th, ta = tgt[k]
+            num += w[k] * (th + ta)
+            den += w[k] * (A[h] * D[a] * H + A[a] * D[h])
         if den > 0:
             base = num / den
 
@@ -52,20 +165,21 @@ def fit(matches, ref_date, half_life_days=180, window_days=540, iters=25, min_ma
         d_num = {t: 0.0 for t in teams}
         d_den = {t: 0.0 for t in teams}
         h_num = h_den = 0.0
-        for k, m in enumerate(train):
-            wk, h, a = w[k], m["home"], m["away"]
+        for k, h in enumerate(hs):
+            wk, a = w[k], as_[k]
+            th, ta = tgt[k]
             # atak payları
-            a_num[h] += wk * m["fthg"]
-            a_num[a] += wk * m["ftag"]
+            a_num[h] += wk * th
+            a_num[a] += wk * ta
             a_den[h] += wk * base * D[a] * H
             a_den[a] += wk * base * D[h]
             # defans payları (yenen goller)
-            d_num[a] += wk * m["fthg"]   # away team i=a, conceded fthg
-            d_num[h] += wk * m["ftag"]
+            d_num[a] += wk * th   # away team i=a, conceded fthg
+            d_num[h] += wk * ta
             d_den[a] += wk * base * A[h] * H
             d_den[h] += wk * base * A[a]
             # ev avantajı
-            h_num += wk * m["fthg"]
+            h_num += wk * th
             h_den += wk * base * A[h] * D[a]
 
         for t in teams:
@@ -85,13 +199,86 @@ def fit(matches, ref_date, half_life_days=180, window_days=540, iters=25, min_ma
                 D[t] /= md
             base *= ma * md
 
-    return {"A": A, "D": D, "H": H, "base": base, "teams": set(teams)}
+        n_it += 1
+        resid = max(_rel_change(H, H_old), _rel_change(base, base_old),
+                    max(_rel_change(A[t], A_old[t]) for t in teams),
+                    max(_rel_change(D[t], D_old[t]) for t in teams))
+        if tol and resid < tol:
+            break
 
+    return A, D, H, base, n_it, resid
 
-def predict(model, home, away):
-    """1X2 / Üst-Alt 2.5 / KG olasılıkları + beklenen goller."""
-    if model is None:
-        return None
+
+def _np_index(hs, as_, teams, w):
+    """numpy yolunun hedeften bağımsız dizileri: (ev indeksi, dep indeksi, ağırlık)."""
+    import numpy as np
+
+    k = len(hs)
+    idx = {t: i for i, t in enumerate(teams)}
+    hi = np.fromiter((idx[t] for t in hs), dtype=np.intp, count=k)
+    ai = np.fromiter((idx[t] for t in as_), dtype=np.intp, count=k)
+    return hi, ai, np.asarray(w, dtype=float)
+
+
+def _solve_np(hs, as_, teams, w, tgt, iters, tol, start, shared=None):
+    """
+    Aynı iterasyon, takımlar tamsayı indeksli dizilerde: her adım np.bincount
+    scatter-add. Pay (num) terimleri iterasyondan bağımsız → bir kez hesaplanır.
+    shared: solve_many'nin paylaştığı _np_index çıktısı. numpy yalnız bu yolda gerekir (opt-in).
+    """
+    import numpy as np
+
+    n, k = len(teams), len(hs)
+    hi, ai, wv = shared or _np_index(hs, as_, teams, w)
+    tv = np.asarray(tgt, dtype=float).reshape(k, 2)
+    wth, wta = wv * tv[:, 0], wv * tv[:, 1]
+
+    num = float((wth + wta).sum())
+    a_num = np.bincount(hi, wth, n) + np.bincount(ai, wta, n)
+    d_num = np.bincount(ai, wth, n) + np.bincount(hi, wta, n)
+    h_num = float(wth.sum())
+
+    A = np.fromiter((start[0][t] for t in teams), dtype=float, count=n)
+    D = np.fromiter((start[1][t] for t in teams), dtype=float, count=n)
+    H, base = start[2], start[3]
+    n_it, resid = 0, float("inf")
+    for _ in range(iters):
+        A_old, D_old, H_old, base_old = A, D, H, base
+        Ah, Aa, Dh, Da = A[hi], A[ai], D[hi], D[ai]
+        den = float((wv * (Ah * Da * H + Aa * Dh)).sum())
+        if den > 0:
+            base = num / den
+
+        wb = wv * base
+        a_den = np.bincount(hi, wb * Da * H, n) + np.bincount(ai, wb * Dh, n)
+        d_den = np.bincount(ai, wb * Ah * H, n) + np.bincount(hi, wb * Aa, n)
+        h_den = float((wb * Ah * Da).sum())
+
+        A = np.divide(a_num, a_den, out=A.copy(), where=a_den > 0)
+        D = np.divide(d_num, d_den, out=D.copy(), where=d_den > 0)
+        if h_den > 0:
+            H = h_num / h_den
+
+        ma = float(A.mean())
+        md = float(D.mean())
+        if ma > 0 and md > 0:
+            A /= ma
+            D /= md
+            base *= ma * md
+
+        n_it += 1
+        resid = max(_rel_change(H, H_old), _rel_change(base, base_old),
+                    float(np.max(np.abs(A - A_old) / np.where(A_old != 0, np.abs(A_old), 1.0))),
+                    float(np.max(np.abs(D - D_old) / np.where(D_old != 0, np.abs(D_old), 1.0))))
+        if tol and resid < tol:
+            break
+
+    return (dict(zip(teams, A.tolist())), dict(zip(teams, D.tolist())), H, base,
+            n_it, resid)
+
+
+def _lambdas(model, home, away):
+    """Modelden (λ_ev, λ_dep) — bilinmeyen takım 1.0, [0.05, 6] aralığına kırpılır."""
     A, D, H, base = model["A"], model["D"], model["H"], model["base"]
     ah = A.get(home, 1.0); dh = D.get(home, 1.0)
     aa = A.get(away, 1.0); da = D.get(away, 1.0)
@@ -99,41 +286,281 @@ def predict(model, home, away):
     lam_a = base * aa * dh
     lam_h = min(max(lam_h, 0.05), 6.0)
     lam_a = min(max(lam_a, 0.05), 6.0)
+    return lam_h, lam_a
+
 
+def _raw_matrix(lam_h, lam_a, rho):
+    """Normalize edilmemiş DC skor matrisi + toplamı."""
     ph = [_pois(i, lam_h) for i in range(MAX_GOALS + 1)]
     pa = [_pois(j, lam_a) for j in range(MAX_GOALS + 1)]
 
-    p_home = p_draw = p_away = 0.0
-    p_over = p_btts = 0.0
+    mat = []
     total = 0.0
     for i in range(MAX_GOALS + 1):
-        for j in range(MAX_GOALS + 1):
-            p = ph[i] * pa[j]
-            # Dixon-Coles düzeltmesi
-            if i == 0 and j == 0:
-                p *= 1.0 - lam_h * lam_a * RHO
-            elif i == 1 and j == 0:
-                p *= 1.0 + lam_a * RHO
-            elif i == 0 and j == 1:
-                p *= 1.0 + lam_h * RHO
-            elif i == 1 and j == 1:
-                p *= 1.0 - RHO
-            if p < 0:
-                p = 0.0
-            total += p
-            if i > j: p_home += p
-            elif i == j: p_draw += p
-            else: p_away += p
-            if i + j >= 3: p_over += p
-            if i >= 1 and j >= 1: p_btts += p
+        pi = ph[i]
+        row = [pi * pj for pj in pa]
+        # Dixon-Coles düzeltmesi
+        if i == 0:
+            row[0] *= 1.0 - lam_h * lam_a * rho
+            row[1] *= 1.0 + lam_h * rho
+        elif i == 1:
+            row[0] *= 1.0 + lam_a * rho
+            row[1] *= 1.0 - rho
+        if i <= 1:
+            row[0] = max(row[0], 0.0)
+            row[1] = max(row[1], 0.0)
+        total += sum(row)
+        mat.append(row)
+    return mat, total
+
+
+def score_matrix(lam_h, lam_a, rho=RHO):
+    """(MAX_GOALS+1)² ortak skor dağılımı p[i][j] (Dixon-Coles düzeltmeli, toplamı 1)."""
+    mat, total = _raw_matrix(lam_h, lam_a, rho)
+    if total > 0:
+        mat = [[p / total for p in row] for row in mat]
+    return mat
+
+
+def probs(lam_h, lam_a, rho=RHO, markets=None):
+    """Verilen λ'lardan 1X2 / Üst-Alt 2.5 / KG olasılıkları (kırpma yok).
+    markets verilirse aynı matristen "markets" alanı da eklenir (bkz. market_probs)."""
+    mat, total = _raw_matrix(lam_h, lam_a, rho)
+    p_home = p_draw = p_away = 0.0
+    p_over = p_btts = 0.0
+    for i, row in enumerate(mat):
+        p_home += sum(row[:i])
+        p_draw += row[i]
+        p_away += sum(row[i + 1:])
+        p_over += sum(row[max(0, 3 - i):])
+        if i >= 1:
+            p_btts += sum(row[1:])
 
     if total > 0:
         p_home /= total; p_draw /= total; p_away /= total
         p_over /= total; p_btts /= total
 
-    return {
+    out = {
         "p_home": p_home, "p_draw": p_draw, "p_away": p_away,
         "p_over25": p_over, "p_under25": 1 - p_over,
         "p_btts_yes": p_btts, "p_btts_no": 1 - p_btts,
         "lambda_home": lam_h, "lambda_away": lam_a,
     }
+    if markets:
+        if total > 0:
+            mat = [[p / total for p in row] for row in mat]
+        out["markets"] = market_probs(mat, markets)
+    return out
+
+
+def predict(model, home, away, markets=None):
+    """1X2 / Üst-Alt 2.5 / KG olasılıkları + beklenen goller (+ opsiyonel market seti)."""
+    if model is None:
+        return None
+    lam_h, lam_a = _lambdas(model, home, away)
+    return probs(lam_h, lam_a, markets=markets)
+
+
+def predict_many(model, pairs, markets=None):
+    """
+    predict()'in toplu hali: [(ev, dep), ...] için tahmin listesi (aynı sıra, aynı şema).
+    numpy varsa N×11×11 skor tensörü tek seferde kurulur; yoksa tek tek predict().
+    """
+    pairs = list(pairs)
+    if model is None:
+        return [None] * len(pairs)
+    lams = [_lambdas(model, h, a) for h, a in pairs]
+    return probs_many([l[0] for l in lams], [l[1] for l in lams], markets=markets)
+
+
+def probs_many(lam_h, lam_a, rho=RHO, markets=None):
+    """probs()'un vektörize hali: λ listelerinden N tahmin."""
+    try:
+        import numpy as np
+    except ImportError:
+        return [probs(h, a, rho, markets) for h, a in zip(lam_h, lam_a)]
+    if not len(lam_h):
+        return []
+
+    P = score_tensor(lam_h, lam_a, rho)
+    lh, la = np.asarray(lam_h, dtype=float), np.asarray(lam_a, dtype=float)
+    m = _masks()
+    p_home = (P * m["home"]).sum(axis=(1, 2))
+    p_draw = (P * m["draw"]).sum(axis=(1, 2))
+    p_away = (P * m["away"]).sum(axis=(1, 2))
+    p_over = (P * m["over25"]).sum(axis=(1, 2))
+    p_btts = (P * m["btts"]).sum(axis=(1, 2))
+    cols = zip(p_home.tolist(), p_draw.tolist(), p_away.tolist(), p_over.tolist(),
+               p_btts.tolist(), lh.tolist(), la.tolist())
+    out = [{
+        "p_home": h, "p_draw": d, "p_away": a,
+        "p_over25": o, "p_under25": 1 - o,
+        "p_btts_yes": b, "p_btts_no": 1 - b,
+        "lambda_home": x, "lambda_away": y,
+    } for h, d, a, o, b, x, y in cols]
+    if markets:
+        spec = market_spec(markets)
+        for pr, mat in zip(out, P.tolist()):
+            pr["markets"] = market_probs(mat, spec)
+    return out
+
+
+def score_tensor(lam_h, lam_a, rho=RHO):
+    """N×(MAX_GOALS+1)×(MAX_GOALS+1) numpy skor tensörü (score_matrix'in toplu hali)."""
+    import numpy as np
+
+    lh = np.asarray(lam_h, dtype=float)[:, None]
+    la = np.asarray(lam_a, dtype=float)[:, None]
+    k, fact = _masks()["k"], _masks()["fact"]
+    ph = np.exp(-lh) * lh ** k / fact
+    pa = np.exp(-la) * la ** k / fact
+    P = ph[:, :, None] * pa[:, None, :]
+    # Dixon-Coles düzeltmesi yalnız 4 düşük skor hücresine (maske = sabit indeksler)
+    lh, la = lh[:, 0], la[:, 0]
+    P[:, 0, 0] *= 1.0 - lh * la * rho
+    P[:, 1, 0] *= 1.0 + la * rho
+    P[:, 0, 1] *= 1.0 + lh * rho
+    P[:, 1, 1] *= 1.0 - rho
+    np.maximum(P, 0.0, out=P)
+    total = P.sum(axis=(1, 2), keepdims=True)
+    return np.divide(P, total, out=P, where=total > 0)
+
+
+_MASKS = None
+
+
+def _masks():
+    """Skor-matrisi sonuç maskeleri (bir kez kurulur): ev/beraberlik/dep, Üst 2.5, KG."""
+    global _MASKS
+    if _MASKS is None:
+        import numpy as np
+        g = np.arange(MAX_GOALS + 1)
+        i, j = g[:, None], g[None, :]
+        _MASKS = {
+            "k": g.astype(float),
+            "fact": np.array([math.factorial(n) for n in g], dtype=float),
+            "home": (i > j).astype(float), "draw": (i == j).astype(float),
+            "away": (i < j).astype(float), "over25": (i + j >= 3).astype(float),
+            "btts": ((i >= 1) & (j >= 1)).astype(float),
+        }
+    return _MASKS
+
+
+def market_spec(markets):
+    """
+    markets → {market: parametre}. Kabul edilen biçimler:
+      True / "all"                 → MARKETS'in tamamı (varsayılan çizgilerle)
+      ["totals", "ah", ...]        → seçilenler, varsayılan çizgilerle
+      {"totals": [1.5, 2.5], "correct_score": 5, "dnb": None}  → özel çizgi / top-N
+    Bilinmeyen market, sonlu olmayan ya da 0.25'in katı olmayan çizgi, correct_score < 1 →
+    ValueError.
+    """
+    if markets is True or markets == "all":
+        return dict(MARKETS)
+    if isinstance(markets, str):
+        markets = [markets]
+    if not isinstance(markets, dict):
+        markets = {name: None for name in markets}
+    spec = {}
+    for name, param in markets.items():
+        if name not in MARKETS:
+            raise ValueError(f"bilinmeyen market: {name!r} ({', '.join(MARKETS)})")
+        if param is None:
+            param = MARKETS[name]
+        elif name == "correct_score":
+            if isinstance(param, float) and not math.isfinite(param):
+                raise ValueError(f"correct_score sonlu olmalı: {param}")
+            param = int(param)
+            if param < 1:
+                raise ValueError(f"correct_score >= 1 olmalı: {param}")
+        elif MARKETS[name] is not None:
+            param = tuple(float(x) for x in param)
+            if not all(math.isfinite(x) for x in param):
+                raise ValueError(f"{name}: çizgiler sonlu olmalı: {param}")
+            if any((x * 4) != int(x * 4) for x in param):
+                raise ValueError(f"{name}: çizgiler 0.25'in katı olmalı: {param}")
+        spec[name] = param
+    return spec
+
+
+def _line_key(x, signed=False):
+    return f"{x:+g}" if signed and x else f"{x:g}"
+
+
+def _over_under(dist, line):
+    """Kesikli dağılımda (dist[k] = P(X=k)) çizgi için over/under/push. Çeyrek çizgi
+    (ör. 2.25) yarı yarıya komşu iki çizgiye bölünür (beklenen bahis payı)."""
+    if (line * 2) != int(line * 2):
+        lo, hi = _over_under(dist, line - 0.25), _over_under(dist, line + 0.25)
+        return {k: (lo.get(k, 0.0) + hi.get(k, 0.0)) / 2 for k in ("over", "under", "push")}
+    over = sum(p for k, p in enumerate(dist) if k > line)
+    under = sum(p for k, p in enumerate(dist) if k < line)
+    out = {"over": over, "under": under}
+    if line == int(line):
+        out["push"] = max(0.0, 1.0 - over - under)
+    return out
+
+
+def _handicap(diff, line):
+    """diff[d + MAX_GOALS] = P(ev - dep = d). Ev sahibine `line` handikap: ev kazanır
+    (d + line > 0) / iade (= 0) / deplasman kazanır (< 0). Çeyrek çizgi ikiye bölünür."""
+    if (line * 2) != int(line * 2):
+        lo, hi = _handicap(diff, line - 0.25), _handicap(diff, line + 0.25)
+        return {k: (lo.get(k, 0.0) + hi.get(k, 0.0)) / 2 for k in ("home", "away", "push")}
+    home = away = push = 0.0
+    for k, p in enumerate(diff):
+        v = k - MAX_GOALS + line
+        if v > 0:
+            home += p
+        elif v < 0:
+            away += p
+        else:
+            push += p
+    out = {"home": home, "away": away}
+    if line == int(line):
+        out["push"] = push
+    return out
+
+
+def market_probs(mat, markets):
+    """
+    Normalize skor matrisinden (score_matrix) istenen marketler — matris TEK geçişte
+    fark / toplam / takım-gol dağılımlarına indirgenir, marketler bunlardan türetilir.
+    """
+    spec = market_spec(markets)
+    n = len(mat)
+    diff = [0.0] * (2 * n - 1)   # ev - dep gol farkı (MAX_GOALS kaydırmalı)
+    tot = [0.0] * (2 * n - 1)    # toplam gol
+    hg = [0.0] * n               # ev golleri marjinali
+    ag = [0.0] * n               # deplasman golleri marjinali
+    for i, row in enumerate(mat):
+        for j, p in enumerate(row):
+            diff[i - j + n - 1] += p
+            tot[i + j] += p
+            hg[i] += p
+            ag[j] += p
+    p_home = sum(diff[n:])
+    p_draw = diff[n - 1]
+    p_away = sum(diff[:n - 1])
+
+    out = {}
+    if "totals" in spec:
+        out["totals"] = {_line_key(x): _over_under(tot, x) for x in spec["totals"]}
+    if "ah" in spec:
+        out["ah"] = {_line_key(x, signed=True): _handicap(diff, x) for x in spec["ah"]}
+    if "double_chance" in spec:
+        out["double_chance"] = {"1X": p_home + p_draw, "X2": p_draw + p_away,
+                                "12": p_home + p_away}
+    if "dnb" in spec:
+        s = p_home + p_away
+        out["dnb"] = {"home": p_home / s if s else 0.5, "away": p_away / s if s else 0.5}
+    if "team_totals" in spec:
+        out["team_totals"] = {
+            "home": {_line_key(x): _over_under(hg, x) for x in spec["team_totals"]},
+            "away": {_line_key(x): _over_under(ag, x) for x in spec["team_totals"]},
+        }
+    if "correct_score" in spec:
+        cells = sorted(((p, i, j) for i, row in enumerate(mat) for j, p in enumerate(row)),
+                       reverse=True)[:spec["correct_score"]]
+        out["correct_score"] = [{"score": f"{i}-{j}", "p": p} for p, i, j in cells]
+    return out
@@ -11,6 +11,7 @@ xG eksik maçta o maç için gole düşülür (graceful fallback).
 import math
 
 import model as M  # predict + _pois aynen kullanılır (çıktı şeması aynı)
+from frame import MatchFrame
 
 
 def _targets(m, w):
@@ -23,9 +24,30 @@ def _targets(m, w):
     return th, ta
 
 
+def _frame_targets(frame, w):
+    """_targets'ın MatchFrame sürümü (eksik xG = NaN → gole düş)."""
+    out = []
+    for hg, ag, hx, ax in zip(frame.fthg, frame.ftag, frame.home_xg, frame.away_xg):
+        if w <= 0 or math.isnan(hx) or math.isnan(ax):
+            out.append((float(hg), float(ag)))
+        else:
+            out.append(((1.0 - w) * hg + w * hx, (1.0 - w) * ag + w * ax))
+    return out
+
+
 def fit(matches, ref_date, xg_weight=0.0, half_life_days=180, window_days=540,
-        iters=25, min_matches=120):
-    """ref_date'ten ÖNCEKİ maçlarla zaman-ağırlıklı harmanlı-hedef Poisson MLE."""
+        iters=25, min_matches=120, backend=None, tol=0.0, init=None):
+    """ref_date'ten ÖNCEKİ maçlarla zaman-ağırlıklı harmanlı-hedef Poisson MLE.
+    tol / init: model.fit ile aynı (erken durma + önceki modelden warm start).
+    matches bir MatchFrame de olabilir."""
+    if isinstance(matches, MatchFrame):
+        train = matches.before(ref_date, window_days)
+        if len(train) < min_matches:
+            return None
+        w = M.decay_weights(train.ordinal, ref_date.toordinal(), half_life_days)
+        return M.solve_frame(train, w, _frame_targets(train, xg_weight), iters=iters,
+                             backend=backend, tol=tol, init=init)
+
     train = [m for m in matches if m["date"] < ref_date]
     if window_days:
         cutoff = ref_date.toordinal() - window_days
@@ -33,12 +55,6 @@ def fit(matches, ref_date, xg_weight=0.0, half_life_days=180, window_days=540,
     if len(train) < min_matches:
         return None
 
-    teams = sorted({m["home"] for m in train} | {m["away"] for m in train})
-    A = {t: 1.0 for t in teams}
-    D = {t: 1.0 for t in teams}
-    H = 1.35
-    base = 1.3
-
     ln2 = math.log(2.0)
     w = []
     tgt = []  # (th, ta) önceden hesapla
@@ -47,50 +63,34 @@ def fit(matches, ref_date, xg_weight=0.0, half_life_days=180, window_days=540,
         w.append(math.exp(-ln2 * age / half_life_days))
         tgt.append(_targets(m, xg_weight))
 
-    for _ in range(iters):
-        num = den = 0.0
-        for k, m in enumerate(train):
-            th, ta = tgt[k]
-            num += w[k] * (th + ta)
-            den += w[k] * (A[m["home"]] * D[m["away"]] * H + A[m["away"]] * D[m["home"]])
-        if den > 0:
-            base = num / den
-
-        a_num = {t: 0.0 for t in teams}; a_den = {t: 0.0 for t in teams}
-        d_num = {t: 0.0 for t in teams}; d_den = {t: 0.0 for t in teams}
-        h_num = h_den = 0.0
-        for k, m in enumerate(train):
-            wk, h, a = w[k], m["home"], m["away"]
-            th, ta = tgt[k]
-            a_num[h] += wk * th
-            a_num[a] += wk * ta
-            a_den[h] += wk * base * D[a] * H
-            a_den[a] += wk * base * D[h]
-            d_num[a] += wk * th   # away defans, home hedefini yer
-            d_num[h] += wk * ta
-            d_den[a] += wk * base * A[h] * H
-            d_den[h] += wk * base * A[a]
-            h_num += wk * th
-            h_den += wk * base * A[h] * D[a]
-
-        for t in teams:
-            if a_den[t] > 0:
-                A[t] = a_num[t] / a_den[t]
-            if d_den[t] > 0:
-                D[t] = d_num[t] / d_den[t]
-        if h_den > 0:
-            H = h_num / h_den
+    # iterasyon model.py ile ortak (py / numpy backend)
+    return M.solve(train, w, tgt, iters=iters, backend=backend, tol=tol, init=init)
 
-        ma = sum(A.values()) / len(teams)
-        md = sum(D.values()) / len(teams)
-        if ma > 0 and md > 0:
-            for t in teams:
-                A[t] /= ma
-                D[t] /= md
-            base *= ma * md
 
-    return {"A": A, "D": D, "H": H, "base": base, "teams": set(teams)}
+def fit_many(matches, ref_date, xg_weights, half_life_days=180, window_days=540,
+             iters=25, min_matches=120, backend=None, tol=0.0, inits=None):
+    """fit()'in ağırlık vektörü sürümü: pencere süzme + zaman ağırlıkları bir kez, her
+    xg_weight için yalnız harmanlı hedef + iterasyon. xg_weights sırasıyla model listesi
+    (yetersiz maçta [None, ...]). inits[i] → i. ağırlığın warm start modeli."""
+    if isinstance(matches, MatchFrame):
+        train = matches.before(ref_date, window_days)
+        if len(train) < min_matches:
+            return [None] * len(xg_weights)
+        w = M.decay_weights(train.ordinal, ref_date.toordinal(), half_life_days)
+        tgts = [_frame_targets(train, xw) for xw in xg_weights]
+    else:
+        train = [m for m in matches if m["date"] < ref_date]
+        if window_days:
+            cutoff = ref_date.toordinal() - window_days
+            train = [m for m in train if m["date"].toordinal() >= cutoff]
+        if len(train) < min_matches:
+            return [None] * len(xg_weights)
+        w = M.decay_weights([m["date"].toordinal() for m in train], ref_date.toordinal(),
+                            half_life_days)
+        tgts = [[_targets(m, xw) for m in train] for xw in xg_weights]
+    return M.solve_many(train, w, tgts, iters=iters, backend=backend, tol=tol, inits=inits)
 
 
 # predict aynen model.py'den
 predict = M.predict
+FIT_TOL = M.FIT_TOL
@@ -0,0 +1,105 @@
+"""
+Walk-forward baz tahmin önbelleği (disk) — backtest_elo / backtest_context / sweep için.
+
+İki precompute() da aynı xG-DC baseline'ı (XG_WEIGHT=0.75) her test günü yeniden
+fit ediyor; süre neredeyse tamamen bu fit'te, her çalıştırma sıfırdan başlıyordu.
+Burada test maçlarının baz 1X2 olasılıkları diske yazılır; anahtar:
+
+    (lig, sezon aralığı, xg_weight, half_life, window, test_from, kod sürümü, veri özeti)
+
+kod sürümü = fit'i biçimlendiren kaynakların özeti (_SOURCES: model / model_xg /
+walkforward / frame; fit değişirse eski kayıt kendiliğinden geçersiz; registry.py de
+aynı özeti kullanır). veri özeti = fit'e giren alanların (tarih, takımlar, gol, xG,
+sezon, sonuç) özeti (sıra bağımsız). Kayıt maç anahtarıyla — (tarih, ev, dep) →
+olasılık — tutulur ve yüklemede test maçlarına bu anahtarla eklenir: aynı maçlar
+farklı sırayla gelse de olasılıklar doğru maça gider; eksik anahtar varsa kayıt yok
+sayılıp yeniden fit edilir. Tilt / harman çalışmaları kaydı milisaniyede yükleyip
+yalnız ucuz skor aşamasını koşar.
+Dosya: <PRED_CACHE_DIR>/<lig>_<sezonlar>_<parametreler>_<özet>.pkl, atomik yazım
+(geçici dosya + os.replace). PRED_CACHE=0 kapatır. Saf stdlib.
+"""
+import hashlib
+import os
+import pickle
+
+import model_xg as MX
+from data import CACHE_DIR
+from walkforward import WalkForwardFitter
+
+PRED_CACHE = os.environ.get("PRED_CACHE", "1") != "0"
+PRED_CACHE_DIR = os.environ.get("PRED_CACHE_DIR", os.path.join(CACHE_DIR, "preds"))
+_SOURCES = ("model.py", "model_xg.py", "walkforward.py", "frame.py")
+_code_version = None
+
+
+def code_version() -> str:
+    """Fit kodunun kaynak özeti (12 hex)."""
+    global _code_version
+    if _code_version is None:
+        h = hashlib.sha1()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for fn in _SOURCES:
+            with open(os.path.join(here, fn), "rb") as f:
+                h.update(f.read())
+        _code_version = h.hexdigest()[:12]
+    return _code_version
+
+
+def data_hash(matches) -> str:
+    """Fit'e ve test seçimine giren alanların özeti (12 hex); sıra bağımsız."""
+    rows = sorted(
+        (m["date"].isoformat(), m["home"], m["away"], m["fthg"], m["ftag"],
+         m.get("home_xg"), m.get("away_xg"), m.get("season"), m.get("ftr"))
+        for m in matches)
+    return hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()[:12]
+
+
+def _key(m):
+    return (m["date"].isoformat(), m["home"], m["away"])
+
+
+def _path(league, matches, xg_weight, half_life, window, test_from):
+    seasons = sorted({m["season"] for m in matches})
+    span = f"{seasons[0]}-{seasons[-1]}" if seasons else "none"
+    name = (f"{league or 'x'}_{span}_w{xg_weight:g}_hl{half_life}_win{window}_t{test_from}"
+            f"_{code_version()}_{data_hash(matches)}.pkl")
+    return os.path.join(PRED_CACHE_DIR, name)
+
+
+def baseline(matches, xg_weight=0.75, test_from="2122", half_life=180, window=540,
+             league=None, verbose=True):
+    """
+    Test maçları (season >= test_from, ftr ∈ H/D/A) için walk-forward baz tahmin:
+    [(maç, {"H", "D", "A"}), ...] — fit edilemeyen (yetersiz geçmiş) maçlar atlanır.
+    Önbellekte varsa diskten, yoksa fit + yazım.
+    """
+    test = [m for m in matches if m["season"] >= test_from and m["ftr"] in ("H", "D", "A")]
+    path = _path(league, matches, xg_weight, half_life, window, test_from) if PRED_CACHE else None
+    probs = None
+    if path and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                stored = pickle.load(f)
+            probs = [stored[_key(m)] for m in test]  # dict değilse / anahtar eksikse → fit
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, KeyError, TypeError):
+            probs = None
+        if probs is not None and verbose:
+            print(f"[predcache] {os.path.basename(path)}: {len(test)} tahmin diskten")
+
+    if probs is None:
+        # kayan pencere + warm start (bir önceki fit gününün modeli),
+        # gün başına tek toplu predict
+        wf = WalkForwardFitter(matches, xg_weight=xg_weight, half_life_days=half_life,
+                               window_days=window, tol=MX.FIT_TOL, warm_start=True)
+        probs = [None if pr is None else (pr["p_home"], pr["p_draw"], pr["p_away"])
+                 for _, pr in wf.predict_matches(test)]
+        if path:
+            os.makedirs(PRED_CACHE_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump({_key(m): p for m, p in zip(test, probs)}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+
+    return [(m, {"H": p[0], "D": p[1], "A": p[2]})
+            for m, p in zip(test, probs) if p is not None]
@@ -17,7 +17,7 @@ Env: SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, SOCCERDATA_DIR.
 import json
 import os
 
-from data import load_matches
+from data import load_matches, prefetch
 import features_elo as FE
 from publish_xg import FD_TO_FDORG, FDORG_TEAMS, map_teams
 
@@ -56,6 +56,7 @@ def build_rows():
     print("=" * 74)
     print("  ELO → team_elo SNAPSHOT + İSİM EŞLEME (DRY-RUN)")
     print("=" * 74)
+    prefetch(FD_TO_FDORG, range(START, END + 1))  # süren sezon koşullu yenilenir
     for fd_code, fdorg in FD_TO_FDORG.items():
         country = FE.CC[fd_code]
         ms = load_matches(fd_code, START, END)
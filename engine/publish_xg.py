@@ -20,8 +20,11 @@ import difflib
 import re
 import unicodedata
 
+from data import prefetch
 from features import load_features
+import model as M
 import model_xg as MX
+import teammatch
 
 # FD.co.uk → football-data.org kesin override (fuzzy'nin yanıldığı/eksik kaldığı takımlar).
 OVERRIDES = {
@@ -72,8 +75,16 @@ def _score(fd, fdorg):
     return inter / min(len(ta), len(tb))
 
 
+ALIAS_NS = "fd:fdorg"
+
+
+def _norm(name):
+    return " ".join(_tokens(name))
+
+
 def map_teams(fd_teams, fdorg_teams):
-    """FD.co.uk → football-data.org. Override → skor-sıralı greedy (yanlış çalmayı önler)."""
+    """FD.co.uk → football-data.org. Override → teammatch (n-gram adayları, yalnız onlara
+    _score, global birebir atama; kesinleşenler takma ad dosyasına)."""
     mapping, used = {}, set()
     remaining = []
     for t in fd_teams:
@@ -81,17 +92,10 @@ def map_teams(fd_teams, fdorg_teams):
             mapping[t] = OVERRIDES[t]; used.add(OVERRIDES[t])
         else:
             remaining.append(t)
-    # tüm skorları hesapla, en yüksekten ata
-    pairs = []
-    for t in remaining:
-        for f in fdorg_teams:
-            pairs.append((_score(t, f), t, f))
-    pairs.sort(reverse=True, key=lambda p: p[0])
-    done = set()
-    for sc, t, f in pairs:
-        if t in done or f in used or sc < 0.5:
-            continue
-        mapping[t] = f; used.add(f); done.add(t)
+    # takma ad dosyası yalnız okunur; eşleme yayın temiz geçince kesinleşir (write_to_supabase)
+    found, _ = teammatch.match(remaining, [f for f in fdorg_teams if f not in used], _score,
+                               0.5, normalize=_norm, namespace=ALIAS_NS, confirm=None)
+    mapping.update(found)
     unmatched = [t for t in fd_teams if t not in mapping]
     return mapping, unmatched
 
@@ -125,25 +129,12 @@ def convert_params(m):
 
 
 def ts_probs(p, home, away):
-    """TS predict eşdeğeri (parite kontrolü için) — dixon-coles.ts:rates+predict birebir."""
+    """TS predict eşdeğeri (parite kontrolü için) — dixon-coles.ts:rates+predict birebir.
+    λ/μ toplamsal parametrelerden (kırpmasız) hesaplanır; skor matrisi model.probs ile ortak."""
     lam = math.exp(p["attack"].get(home, 0) + p["defense"].get(away, 0) + p["homeAdv"])
     mu = math.exp(p["attack"].get(away, 0) + p["defense"].get(home, 0))
-    rho = p["rho"]
-    def pois(k, l): return math.exp(-l) * l ** k / math.factorial(k) if l > 0 else (1.0 if k == 0 else 0.0)
-    ph = [pois(i, lam) for i in range(11)]; pa = [pois(j, mu) for j in range(11)]
-    H = Dw = Aw = tot = 0.0
-    for i in range(11):
-        for j in range(11):
-            pr = ph[i] * pa[j]
-            if i == 0 and j == 0: pr *= 1 - lam * mu * rho
-            elif i == 0 and j == 1: pr *= 1 + lam * rho
-            elif i == 1 and j == 0: pr *= 1 + mu * rho
-            elif i == 1 and j == 1: pr *= 1 - rho
-            pr = max(pr, 0.0); tot += pr
-            if i > j: H += pr
-            elif i == j: Dw += pr
-            else: Aw += pr
-    return (H / tot, Dw / tot, Aw / tot)
+    pr = M.probs(lam, mu, p["rho"])
+    return (pr["p_home"], pr["p_draw"], pr["p_away"])
 
 
 def remap_names(params, fd_teams, fdorg_teams):
@@ -184,6 +175,11 @@ def write_to_supabase(rows):
                 written.append(r["league_code"])
         except Exception as e:
             print(f"  ❌ {r['league_code']}: yazım hatası — {e}")
+            continue
+        try:
+            teammatch.save_aliases(ALIAS_NS, r.get("mapping"))  # yayında doğrulandı
+        except OSError as e:
+            print(f"  ⚠️  {r['league_code']}: yazıldı, takma adlar kaydedilemedi — {e}")
     print(f"  Toplam yazılan: {len(written)}/{len(rows)} → {written}")
     return written
 
@@ -195,6 +191,7 @@ def main(dry_run=True):
     print("=" * 74)
     print("  xG-DC → dc_model_params DÖNÜŞÜM + İSİM EŞLEME (DRY-RUN)" if dry_run else "  YAYIN")
     print("=" * 74)
+    prefetch(FD_TO_FDORG, range(START, END + 1))  # süren sezon koşullu yenilenir
     for fd_code, fdorg in FD_TO_FDORG.items():
         recs, stats = load_features(fd_code, START, END, verbose=False)
         model = MX.fit(recs, ref, xg_weight=XG_WEIGHT, half_life_days=180, window_days=540, iters=25)
@@ -227,7 +224,7 @@ def main(dry_run=True):
             "trained_matches": len([r for r in recs if r['date'] < ref]),
             "season": f"{START},{END}", "source": "xg-dc-1.0",
             "n_teams": mapped, "coverage_pct": cov, "parity_max_diff": max_diff,
-            "unmatched": unmatched,
+            "unmatched": unmatched, "mapping": mapping,
         })
     print("=" * 74)
     out_path = os.path.join(os.path.dirname(__file__), "xg_params_output.json")
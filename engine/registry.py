@@ -0,0 +1,126 @@
+"""
+Fit edilmiş model kaydı (disk) — servis yeniden başlayınca ilk /predict fit beklemesin.
+
+service.py modelleri yalnız süreç içi önbellekte tutuyordu: her systemd yeniden başlatmasında
+ve /update sonrasında her ligin ilk /predict'i tam M.fit öder (n8n 30s zaman aşımı riski).
+Burada her fit'in {A, D, H, base} parametreleri diske yazılır; anahtar:
+  (league_id, ref_ordinal, model sürümü, lig verisinin içerik özeti)
+model sürümü = MODEL_VERSION + fit kodunun özeti (predcache.code_version: model /
+model_xg / walkforward / frame kaynağı) → fit matematiği, FIT_TOL ya da varsayılanlar
+değişince MODEL_VERSION elle artırılmasa da eski kayıt kullanılmaz; iki önbellek aynı
+şekilde geçersizleşir.
+Depo değişirse özet değişir → eski kayıt kullanılmaz (sessiz bayat model yok).
+
+Dosya başına bir model: <MODEL_REGISTRY_DIR>/<lig>_<ref_ord>_<sürüm>_<özet>.json
+Yazım atomik (geçici dosya + os.replace). Lig başına son REGISTRY_KEEP ref günü tutulur.
+Saf stdlib.
+"""
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+from predcache import code_version
+from store import STORE_PATH
+
+REGISTRY_DIR = os.environ.get(
+    "MODEL_REGISTRY_DIR",
+    os.path.join(os.path.dirname(STORE_PATH) or ".", "models"),
+)
+REGISTRY_KEEP = int(os.environ.get("REGISTRY_KEEP", "7"))  # lig başına tutulan ref günü
+
+_NAME = re.compile(r"^(-?\d+)_(\d+)_(.+)_([0-9a-f]+)\.json$")
+
+
+def _safe(version: str) -> str:
+    return re.sub(r"[^A-Za-z0-9.\-]", "-", version)
+
+
+class ModelRegistry:
+    """Diskteki fit'li model kaydı. load/save anahtarı: (lig, ref_ord, sürüm, store özeti)."""
+
+    def __init__(self, root: str = REGISTRY_DIR, version: str = "dc-1.0", keep: int = REGISTRY_KEEP):
+        self.root = root
+        self.version = _safe(f"{version}-{code_version()[:8]}")
+        self.keep = keep
+
+    def _path(self, league_id, ref_ord, store_hash):
+        return os.path.join(self.root, f"{league_id}_{ref_ord}_{self.version}_{store_hash}.json")
+
+    def _entries(self, league_id):
+        """Bu sürümde ligin kayıtları: [(ref_ord, store_hash, dosya adı), ...]."""
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for fn in os.listdir(self.root):
+            m = _NAME.match(fn)
+            if m and int(m.group(1)) == league_id and m.group(3) == self.version:
+                out.append((int(m.group(2)), m.group(4), fn))
+        return out
+
+    @staticmethod
+    def _read(path):
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        return {"A": raw["A"], "D": raw["D"], "H": raw["H"], "base": raw["base"],
+                "teams": set(raw["A"]), "iters": raw.get("iters"), "residual": raw.get("residual")}
+
+    def load(self, league_id: int, ref_ord: int, store_hash: str):
+        """Kayıtlı model ya da None (yok / bozuk)."""
+        path = self._path(league_id, ref_ord, store_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            return self._read(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def latest(self, league_id: int, before_ord: int):
+        """ref_ord'u before_ord'dan küçük en yeni kayıt (herhangi bir store özeti) —
+        warm start için dünkü parametreler. Yoksa None."""
+        cands = sorted(e for e in self._entries(league_id) if e[0] < before_ord)
+        for _, _, fn in reversed(cands):
+            try:
+                return self._read(os.path.join(self.root, fn))
+            except (OSError, ValueError, KeyError):
+                continue
+        return None
+
+    def save(self, league_id: int, ref_ord: int, store_hash: str, model: dict):
+        """Modeli atomik yaz, sonra ligin eski kayıtlarını buda."""
+        if model is None:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(league_id, ref_ord, store_hash)
+        body = {
+            "league_id": league_id, "ref_ord": ref_ord, "version": self.version,
+            "store_hash": store_hash,
+            "A": model["A"], "D": model["D"], "H": model["H"], "base": model["base"],
+            "iters": model.get("iters"), "residual": model.get("residual"),
+            "saved_at": datetime.now(timezone.utc).isoformat(),
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(body, f)
+        os.replace(tmp, path)
+        self.prune(league_id)
+
+    def prune(self, league_id: int):
+        """Lig başına en yeni `keep` ref gününü tut; aynı gün için yalnız en yeni yazılanı."""
+        entries = self._entries(league_id)
+        keep_ords = sorted({e[0] for e in entries}, reverse=True)[:self.keep]
+        newest = {}
+        for o, _, fn in entries:
+            p = os.path.join(self.root, fn)
+            try:
+                mt = os.path.getmtime(p)
+            except OSError:
+                continue
+            if o not in newest or mt > newest[o][0]:
+                newest[o] = (mt, fn)
+        for o, _, fn in entries:
+            if o not in keep_ords or newest.get(o, (0, fn))[1] != fn:
+                try:
+                    os.remove(os.path.join(self.root, fn))
+                except OSError:
+                    pass
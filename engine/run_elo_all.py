@@ -4,12 +4,14 @@
 """
 import features_elo as FE
 import backtest_elo as BE
+from data import prefetch
 from features import load_features
 
 LEAGUES = ("E0", "SP1", "I1", "D1", "F1")
 START, END = 2020, 2024
 
 # 1) tüm liglerin feature'larını yükle + snapshot havuzunu topla (bir kez)
+prefetch(LEAGUES, range(START, END + 1))  # 5 lig × sezon CSV'leri eşzamanlı
 data = {}
 alldates = []
 for lg in LEAGUES:
@@ -36,8 +38,11 @@ for lg in LEAGUES:
     a, b, total, ntr = fit
     preds, ehits = BE.precompute(recs, lg, grid, snaps, a, b, total)
     cov = ehits / len(preds) * 100 if preds else 0
-    base = BE.score(preds, 0.0)
-    results = [BE.score(preds, lam) for lam in (0.0, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5)]
+    if not preds:
+        print(f"{lg:>4} | test maçı yok", flush=True)
+        continue
+    results = BE.score_grid(preds, (0.0, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5))
+    base = results[0]
     best = min(results, key=lambda r: r["logloss"])
     dLL = best["logloss"] - base["logloss"]
     dBr = best["brier"] - base["brier"]
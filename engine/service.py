@@ -2,33 +2,66 @@
 Footy Predict Service — FastAPI
 n8n bu servisi HTTP ile çağırır:
     POST /predict   {"fixtures": [ ...site fixture shape... ]}  -> {"predictions":[...]}
-    POST /backfill  {"days": 540}   (admin: depoyu doldur)
-    POST /update    {"days": 3}     (admin: son günleri güncelle)
+                    opsiyonel "markets": true | ["totals","ah",...] | {"totals":[1.5,2.5],...}
+                    opsiyonel "context": true → form/H2H tilt (CONTEXT_BETAS'taki ligler)
+    POST /backfill  {"days": 540}   (admin: depoyu doldur)      -> {"job_id"} (arka planda)
+    POST /update    {"days": 3}     (admin: son günleri güncelle) -> {"job_id"} (arka planda)
+    GET  /jobs/{id}                 (admin işinin durumu/ilerlemesi)
     GET  /health
     GET  /status
 
 Model: engine/model.py (Dixon-Coles-lite). Veri: engine/store.py (FotMob sonuçları).
+Fit'ler engine/registry.py ile diske yazılır → yeniden başlatmada ilk istek fit beklemez.
+Süreç içi fit önbelleği sınırlıdır (engine/fitcache.py: LRU + yaş + bayt bütçesi).
+Form/H2H bağlamı: CONTEXT_BETAS'taki her lig için FotMob takım id'siyle anahtarlı
+features_context.ContextState; /update sonrası yalnız yeni satırlar eklenir, /predict'te
+fikstür başına O(1) okuma + apply_tilt (1X2; gol/market olasılıkları değişmez).
 Çalıştır:  uvicorn service:app --host 0.0.0.0 --port 8000
 """
+import json
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from fastapi import FastAPI, Header, HTTPException
 from pydantic import BaseModel
 
 import model as M
+from features_context import ContextState, apply_tilt
+from fitcache import FitCache
+from jobs import JobRunner, fit_league
+from registry import ModelRegistry
 from store import ResultStore, backfill, update_recent, _parse_dt, league_name
 
 MODEL_VERSION = os.environ.get("MODEL_VERSION", "dc-1.0")
 SERVICE_TOKEN = os.environ.get("PREDICT_SERVICE_TOKEN", "")  # opsiyonel: /predict & admin koruması
 MIN_LEAGUE_MATCHES = int(os.environ.get("MIN_LEAGUE_MATCHES", "150"))
+FIT_WORKERS = int(os.environ.get("FIT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# >0: tam ref günü için fit yoksa aynı ligin en çok bu kadar gün önceki fit'i kullanılır
+FIT_REUSE_DAYS = int(os.environ.get("FIT_REUSE_DAYS", "0"))
+# lig başına form/H2H tilt beta'ları (backtest_context taramasından): {"47": [bf, bh], ...}
+CONTEXT_BETAS = {int(k): (float(v[0]), float(v[1]))
+                 for k, v in json.loads(os.environ.get("CONTEXT_BETAS") or "{}").items()}
 
 app = FastAPI(title="Footy Predict Service", version=MODEL_VERSION)
 store = ResultStore()
+registry = ModelRegistry(version=MODEL_VERSION)
+jobs = JobRunner()
 
 # (league_id, ref_ordinal) -> fitted model | None
-_fit_cache: Dict[tuple, Optional[dict]] = {}
+# Admin işi yeni seti hazırlayıp bu ismi TEK atamayla değiştirir; /predict başta
+# referansı alır → süren tahminler eski setle biter.
+_fit_cache = FitCache()
+_swap_lock = threading.Lock()
+
+# league_id -> {"state": ContextState, "n": işlenen maç, "last": son maç tarihi,
+#              "played": {takım id: son maç ordinal'i},
+#              "raw": kurulduğu andaki store.league_count (değişim sınaması)}
+_ctx: Dict[int, dict] = {}
+_ctx_lock = threading.Lock()
 
 
 def _check_token(authorization: Optional[str]):
@@ -39,19 +72,130 @@ def _check_token(authorization: Optional[str]):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
-def _get_model(league_id: int, ref_ord: int) -> Optional[dict]:
+def _warm_start(league_id: int, ref_ord: int) -> Optional[dict]:
+    """Aynı ligin ref_ord'dan önceki en yakın fit'li modeli (dünkü parametreler) ya da None.
+    Önce süreç içi önbellek, yoksa diskteki kayıt (yeniden başlatma sonrası)."""
+    mdl = _fit_cache.nearest(league_id, ref_ord)
+    if mdl is not None:
+        return mdl
+    return registry.latest(league_id, ref_ord + 1)
+
+
+def _get_model(league_id: int, ref_ord: int, cache: Optional[FitCache] = None) -> Optional[dict]:
+    cache = _fit_cache if cache is None else cache
     key = (league_id, ref_ord)
-    if key in _fit_cache:
-        return _fit_cache[key]
-    matches = store.load_for_fit(league_id)
-    mdl = None
-    if len(matches) >= MIN_LEAGUE_MATCHES:
-        ref_date = datetime.fromordinal(ref_ord)
-        mdl = M.fit(matches, ref_date)
-    _fit_cache[key] = mdl
+    found, mdl = cache.lookup(key)
+    if found:
+        return mdl
+    store_hash = store.league_hash(league_id)
+    mdl = registry.load(league_id, ref_ord, store_hash)
+    if mdl is None and FIT_REUSE_DAYS > 0:
+        near = cache.nearest(league_id, ref_ord, FIT_REUSE_DAYS, reuse=True)
+        if near is not None:
+            return near
+    if mdl is None:
+        matches = store.load_for_fit(league_id)
+        if len(matches) >= MIN_LEAGUE_MATCHES:
+            ref_date = datetime.fromordinal(ref_ord)
+            mdl = M.fit(matches, ref_date, tol=M.FIT_TOL, init=_warm_start(league_id, ref_ord))
+            registry.save(league_id, ref_ord, store_hash, mdl)
+    cache.put(key, mdl)
     return mdl
 
 
+def _league_context(lid: int) -> dict:
+    """Ligin canlı bağlam durumu; depoda yeni maç varsa yalnız onlar eklenir.
+    Yeni maçlar son işlenenden eskiyse (geç gelen sonuç) lig baştan kurulur."""
+    # league_count ham satır sayar (load_for_fit tarihsiz / id'siz satırları atar) → n ile
+    # değil, kurulduğu andaki ham sayıyla kıyaslanır; yeni satır yoksa O(1)
+    raw = store.league_count(lid)
+    cur = _ctx.get(lid)
+    if cur is not None and cur["raw"] == raw:
+        return cur
+    rows = store.load_for_fit(lid)  # tarihe göre sıralı
+    with _ctx_lock:
+        cur = _ctx.get(lid)  # eşzamanlı bir çağrı arada eklemiş olabilir
+        n = cur["n"] if cur is not None else 0
+        if (cur is not None and n <= len(rows) and (n == 0 or rows[n - 1]["date"] <= cur["last"])
+                and (n == len(rows) or rows[n]["date"] > cur["last"])):
+            new, st, played = rows[n:], cur["state"], cur["played"]
+        else:
+            new, st, played = rows, ContextState(), {}
+        for m in new:
+            st.update(m["home"], m["away"], m["fthg"], m["ftag"])
+            played[m["home"]] = played[m["away"]] = m["date"].toordinal()
+        out = {"state": st, "n": len(rows), "last": rows[-1]["date"] if rows else None,
+               "played": played, "raw": raw}
+        _ctx[lid] = out
+    return out
+
+
+def _refresh_context() -> dict:
+    """/update ve /backfill sonrası: tilt'i açık liglerin bağlamına yeni maçları ekle."""
+    return {"context_leagues": sum(1 for lid in CONTEXT_BETAS if _league_context(lid)["n"])}
+
+
+def _refit_all(job, ref_ord: int) -> dict:
+    """MIN_LEAGUE_MATCHES üstündeki tüm ligleri işçi havuzunda fit et, seti atomik değiştir."""
+    global _fit_cache
+    leagues = [l for l in store.leagues() if store.league_count(l) >= MIN_LEAGUE_MATCHES]
+    job.update(phase="fit", leagues_total=len(leagues), leagues_done=0)
+    new = _fit_cache.fresh()
+    tasks = []
+    for lid in leagues:
+        store_hash = store.league_hash(lid)
+        mdl = registry.load(lid, ref_ord, store_hash)
+        matches = None if mdl else store.load_for_fit(lid)
+        if mdl is not None or len(matches) < MIN_LEAGUE_MATCHES:
+            new.put((lid, ref_ord), mdl)
+            job.update(leagues_done=job.progress["leagues_done"] + 1)
+            continue
+        tasks.append((lid, matches, store_hash, _warm_start(lid, ref_ord)))
+
+    hashes = {t[0]: t[2] for t in tasks}
+
+    def _done(lid, mdl):
+        registry.save(lid, ref_ord, hashes[lid], mdl)
+        new.put((lid, ref_ord), mdl)
+        job.update(leagues_done=job.progress["leagues_done"] + 1)
+
+    if FIT_WORKERS > 1 and len(tasks) > 1:
+        ctx = multiprocessing.get_context("spawn")  # uvicorn iş parçacıklarıyla fork yerine
+        with ProcessPoolExecutor(max_workers=FIT_WORKERS, mp_context=ctx) as ex:
+            futs = [ex.submit(fit_league, lid, ms, ref_ord, init) for lid, ms, _, init in tasks]
+            for fut in as_completed(futs):
+                _done(*fut.result())
+    else:
+        for lid, ms, _, init in tasks:
+            _done(*fit_league(lid, ms, ref_ord, init))
+
+    job.update(phase="swap")
+    with _swap_lock:
+        _fit_cache = new
+    return {"ref_date": datetime.fromordinal(ref_ord).strftime("%Y-%m-%d"),
+            "leagues_fitted": sum(1 for v in new.values() if v is not None),
+            "leagues_refit": len(tasks)}
+
+
+def _refresh_job(crawl):
+    """Arka plan işi: tara → depoyu yükle → tüm ligleri fit et + değiştir."""
+    def run(job):
+        job.update(phase="crawl")
+        added = crawl()
+        store.reload()
+        out = {"added": added, "store_total": store.total()}
+        job.update(phase="context")
+        out.update(_refresh_context())
+        out.update(_refit_all(job, datetime.now(timezone.utc).toordinal()))
+        return out
+    return run
+
+
+def _job_response(job, created: bool) -> dict:
+    return {"ok": True, "job_id": job.id, "created": created, "status": job.status,
+            "poll": f"/jobs/{job.id}"}
+
+
 def _pick_and_conf(pr: dict):
     opts = {"1": pr["p_home"], "X": pr["p_draw"], "2": pr["p_away"]}
     pick = max(opts, key=opts.get)
@@ -74,12 +218,28 @@ def _rationale_tr(pr: dict, home: str, away: str, pick: str) -> str:
 class PredictRequest(BaseModel):
     fixtures: List[Dict[str, Any]]
     ref_date: Optional[str] = None  # 'YYYY-MM-DD' (yoksa bugün UTC)
+    # ek marketler (aynı skor matrisinden): bkz. model.market_spec
+    markets: Optional[Union[bool, str, List[str], Dict[str, Any]]] = None
+    # form/H2H tilt (yalnız CONTEXT_BETAS'taki ligler; takımlarından biri ref günü ya da
+    # sonrasında depoda maç oynamışsa o fikstür atlanır, context.reason açıklar)
+    context: Optional[bool] = None
 
 
 class AdminDays(BaseModel):
     days: Optional[int] = None
 
 
+def _round_tree(v, nd=4):
+    """Market çıktısındaki tüm olasılıkları yuvarla (iç içe dict/list)."""
+    if isinstance(v, dict):
+        return {k: _round_tree(x, nd) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_round_tree(x, nd) for x in v]
+    if isinstance(v, float):
+        return round(v, nd)
+    return v
+
+
 def _f(fx: dict, *keys):
     for k in keys:
         if k in fx and fx[k] is not None:
@@ -105,9 +265,46 @@ def status():
             for l in leagues[:15]
         ],
         "min_league_matches": MIN_LEAGUE_MATCHES,
+        "model_registry": registry.root,
+        "model_registry_version": registry.version,
+        "fit_cache": dict(_fit_cache.stats(), reuse_days=FIT_REUSE_DAYS),
+        "context": {str(lid): {"betas": list(CONTEXT_BETAS[lid]),
+                               "matches": _ctx[lid]["n"] if lid in _ctx else None}
+                    for lid in CONTEXT_BETAS},
     }
 
 
+def _tilt_group(lid: int, group: List[dict], ref_ord: int):
+    """Ligin tahminlerine form/H2H tilt'i (yerinde: r["pr"] kopyası + r["ctx"] özeti).
+    Form yalnız takımın kendi maçlarına, H2H yalnız çifte bağlı → iki takımın da ref gününde
+    ya da sonrasında depoda maçı yoksa canlı durum sızıntısızdır. Varsa (aynı gün erken
+    oynanmış bu fikstür, geçmiş tarihli istek) yalnız o fikstür atlanır, ctx nedeni taşır."""
+    c = _league_context(lid)
+    bf, bh = CONTEXT_BETAS[lid]
+    st, played = c["state"], c["played"]
+    with _ctx_lock:
+        ctxs = []
+        for r in group:
+            last = max(played.get(r["hk"], 0), played.get(r["ak"], 0))
+            if r["pr"] is None or last >= ref_ord:
+                ctxs.append(last)
+            else:
+                ctxs.append(st.context(r["hk"], r["ak"]))
+    for r, ctx in zip(group, ctxs):
+        pr = r["pr"]
+        if pr is None:
+            continue
+        if not isinstance(ctx, dict):
+            r["ctx"] = {"bf": bf, "bh": bh, "tilted": False,
+                        "reason": "same-day results" if ctx == ref_ord else "later results"}
+            continue
+        base = {"H": pr["p_home"], "D": pr["p_draw"], "A": pr["p_away"]}
+        p = apply_tilt(base, ctx, bf, bh)
+        r["pr"] = dict(pr, p_home=p["H"], p_draw=p["D"], p_away=p["A"])
+        r["ctx"] = {"bf": bf, "bh": bh, "home_n": ctx["home_n"], "away_n": ctx["away_n"],
+                    "h2h_n": ctx["h2h_n"], "tilted": p is not base}
+
+
 @app.post("/predict")
 def predict(req: PredictRequest, authorization: Optional[str] = Header(default=None)):
     _check_token(authorization)
@@ -117,24 +314,32 @@ def predict(req: PredictRequest, authorization: Optional[str] = Header(default=N
     else:
         ref_dt = datetime.now(timezone.utc)
     ref_ord = ref_dt.toordinal()
-
-    out: List[dict] = []
+    cache = _fit_cache  # bu istek boyunca aynı model seti (arka plan değişimine karşı)
+
+    markets = None
+    if req.markets:
+        try:
+            markets = M.market_spec(req.markets)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"markets: {e}")
+
+    # 1) süz + modelleri bul; 2) lig başına TEK predict_many (maç günü tek çağrıda)
+    rows: List[dict] = []
+    models: Dict[int, Optional[dict]] = {}  # lig başına tek önbellek bakışı
     skipped = 0
     for fx in req.fixtures:
         fid = _f(fx, "id", "fixtureId")
         lid = _f(fx, "leagueId", "league_id")
         home_id = _f(fx, "homeTeamId", "homeId")
         away_id = _f(fx, "awayTeamId", "awayId")
-        home_name = _f(fx, "homeTeam", "homeName") or "Ev"
-        away_name = _f(fx, "awayTeam", "awayName") or "Deplasman"
-        lname = _f(fx, "league", "leagueName") or league_name(lid)
-        kickoff = _f(fx, "date", "utcTime", "kickoff")
 
         if fid is None or lid is None or home_id is None or away_id is None:
             skipped += 1
             continue
 
-        mdl = _get_model(int(lid), ref_ord)
+        if int(lid) not in models:
+            models[int(lid)] = _get_model(int(lid), ref_ord, cache)
+        mdl = models[int(lid)]
         if mdl is None:
             skipped += 1
             continue
@@ -144,20 +349,39 @@ def predict(req: PredictRequest, authorization: Optional[str] = Header(default=N
             # takım geçmişte yok (yeni çıkmış/az maç) -> güvenilmez, atla
             skipped += 1
             continue
+        rows.append({"fx": fx, "fid": fid, "lid": int(lid), "home_id": home_id,
+                     "away_id": away_id, "hk": hk, "ak": ak, "model": mdl})
+
+    by_league: Dict[int, List[dict]] = {}
+    for r in rows:
+        by_league.setdefault(r["lid"], []).append(r)
+    for lid, group in by_league.items():
+        prs = M.predict_many(group[0]["model"], [(r["hk"], r["ak"]) for r in group],
+                             markets=markets)
+        for r, pr in zip(group, prs):
+            r["pr"] = pr
+        if req.context and lid in CONTEXT_BETAS:
+            _tilt_group(lid, group, ref_ord)
 
-        pr = M.predict(mdl, hk, ak)
+    out: List[dict] = []
+    for r in rows:
+        fx, pr = r["fx"], r["pr"]
         if pr is None:
             skipped += 1
             continue
+        home_name = _f(fx, "homeTeam", "homeName") or "Ev"
+        away_name = _f(fx, "awayTeam", "awayName") or "Deplasman"
+        lname = _f(fx, "league", "leagueName") or league_name(r["lid"])
+        kickoff = _f(fx, "date", "utcTime", "kickoff")
 
         pick, conf = _pick_and_conf(pr)
-        out.append({
-            "fixtureId": int(fid),
-            "leagueId": int(lid),
+        row = {
+            "fixtureId": int(r["fid"]),
+            "leagueId": r["lid"],
             "leagueName": lname,
-            "homeId": int(home_id),
+            "homeId": int(r["home_id"]),
             "homeName": home_name,
-            "awayId": int(away_id),
+            "awayId": int(r["away_id"]),
             "awayName": away_name,
             "kickoff": kickoff,
             "p_home": round(pr["p_home"], 4),
@@ -171,7 +395,12 @@ def predict(req: PredictRequest, authorization: Optional[str] = Header(default=N
             "confidence": round(conf, 4),
             "rationale": _rationale_tr(pr, home_name, away_name, pick),
             "modelVersion": MODEL_VERSION,
-        })
+        }
+        if markets:
+            row["markets"] = _round_tree(pr["markets"])
+        if "ctx" in r:
+            row["context"] = r["ctx"]
+        out.append(row)
 
     return {
         "ok": True,
@@ -187,16 +416,23 @@ def predict(req: PredictRequest, authorization: Optional[str] = Header(default=N
 @app.post("/backfill")
 def admin_backfill(body: AdminDays, authorization: Optional[str] = Header(default=None)):
     _check_token(authorization)
-    n = backfill(body.days or 540)
-    store.reload()
-    _fit_cache.clear()
-    return {"ok": True, "added": n, "store_total": store.total()}
+    days = body.days or 540
+    job, created = jobs.submit("refresh", _refresh_job(lambda: backfill(days)))
+    return _job_response(job, created)
 
 
 @app.post("/update")
 def admin_update(body: AdminDays, authorization: Optional[str] = Header(default=None)):
     _check_token(authorization)
-    n = update_recent(body.days or 3)
-    store.reload()
-    _fit_cache.clear()
-    return {"ok": True, "added": n, "store_total": store.total()}
+    days = body.days or 3
+    job, created = jobs.submit("refresh", _refresh_job(lambda: update_recent(days)))
+    return _job_response(job, created)
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str, authorization: Optional[str] = Header(default=None)):
+    _check_token(authorization)
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job bulunamadı")
+    return {"ok": True, **job.to_dict()}
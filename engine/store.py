@@ -6,25 +6,44 @@ Saf stdlib (urllib + json). Bağımlılık yok.
 Kullanım:
     FOOTBALL_API_KEY=... python3 store.py backfill 540   # son 540 günü doldur
     FOOTBALL_API_KEY=... python3 store.py update 3        # son 3 günü güncelle
+    CRAWL_WORKERS=4 CRAWL_RPS=3 ... store.py backfill 540 # eşzamanlı tarama (crawler.py)
     python3 store.py stats                                # depo özeti
+    python3 store.py gaps                                 # ledger'daki kapsam boşlukları
+    python3 store.py import [results.jsonl]               # JSONL -> sütunlu depo (colstore.py)
+    python3 store.py export out.jsonl                     # sütunlu depo -> JSONL
 """
+import calendar
+import hashlib
 import json
 import os
 import sys
+import threading
 import time
 import urllib.request
+from array import array
 from datetime import datetime, timedelta, timezone
 
+from colstore import ColumnStore
+from frame import COLUMNS as FRAME_COLUMNS, MatchFrame
+
 HOST = "free-api-live-football-data.p.rapidapi.com"
-BASE = f"https://{HOST}"
+BASE = os.environ.get("FOOTBALL_API_BASE", f"https://{HOST}")  # test: yerel sahte sunucu
 KEY = os.environ.get("FOOTBALL_API_KEY", "")
 STORE_PATH = os.environ.get("STORE_PATH", os.path.expanduser("~/.footy/results.jsonl"))
 LEAGUE_MAP_PATH = os.environ.get(
     "LEAGUE_MAP_PATH",
     os.path.join(os.path.dirname(STORE_PATH) or ".", "leagues.json"),
 )
+# Sütunlu ikili depo (colstore.py). STORE_FORMAT: auto (dizin varsa kullan) | col | jsonl
+COLSTORE_DIR = os.environ.get("RESULT_COLSTORE_DIR", os.path.splitext(STORE_PATH)[0] + ".col")
+STORE_FORMAT = os.environ.get("STORE_FORMAT", "auto")
 REQ_SLEEP = float(os.environ.get("REQ_SLEEP", "1.5"))      # istekler arası bekleme (sn)
 REQ_BACKOFF = float(os.environ.get("REQ_BACKOFF", "10"))   # 429'da temel geri çekilme (sn)
+# Gün ledger'ı: tamamlanan (kesinleşmiş) günler tekrar istenmez; son REPOLL_DAYS gün hep yeniden
+LEDGER_PATH = os.environ.get("STORE_LEDGER", STORE_PATH + ".ledger.json")
+REPOLL_DAYS = int(os.environ.get("REPOLL_DAYS", "3"))
+CRAWL_WORKERS = int(os.environ.get("CRAWL_WORKERS", "1"))  # >1 → crawler.py ile eşzamanlı
+CRAWL_RPS = float(os.environ.get("CRAWL_RPS", "2"))        # eşzamanlı modda istek/sn sınırı
 
 _PLACEHOLDER = {"", "RAPIDAPI_ANAHTARIN", "PASTE_YOUR_RAPIDAPI_KEY_HERE"}
 
@@ -45,12 +64,23 @@ def _check_key():
         )
 
 
-def _fetch(path: str, retries: int = 4):
+def _request(path: str, base: str = None):
     _check_key()
-    req = urllib.request.Request(
-        BASE + path,
+    return urllib.request.Request(
+        (base or BASE) + path,
         headers={"x-rapidapi-host": HOST, "x-rapidapi-key": KEY},
     )
+
+
+def _auth_error(code: int) -> AuthError:
+    return AuthError(
+        f"HTTP {code} — anahtar geçersiz YA DA bu endpoint planında yok. "
+        "RapidAPI'de 'Free API Live Football Data' aboneliğini ve anahtarı kontrol et."
+    )
+
+
+def _fetch(path: str, retries: int = 4, base: str = None):
+    req = _request(path, base)
     for attempt in range(retries):
         try:
             with urllib.request.urlopen(req, timeout=30) as r:
@@ -62,16 +92,13 @@ def _fetch(path: str, retries: int = 4):
                 time.sleep(wait)
                 continue
             if e.code in (401, 403):
-                raise AuthError(
-                    f"HTTP {e.code} — anahtar geçersiz YA DA bu endpoint planında yok. "
-                    "RapidAPI'de 'Free API Live Football Data' aboneliğini ve anahtarı kontrol et."
-                )
+                raise _auth_error(e.code)
             raise
     raise RateLimited("429 tekrar denemeleri tükendi")
 
 
-def matches_by_date(yyyymmdd: str):
-    j = _fetch(f"/football-get-matches-by-date?date={yyyymmdd}")
+def matches_by_date(yyyymmdd: str, fetch=None):
+    j = (fetch or _fetch)(f"/football-get-matches-by-date?date={yyyymmdd}")
     resp = (j or {}).get("response") or {}
     return resp.get("matches") or []
 
@@ -183,34 +210,166 @@ def _existing_ids() -> set:
     return ids
 
 
-def _collect(days_back_start: int, days_back_end: int, sleep: float = None) -> int:
-    """[days_back_end .. days_back_start] gün öncesini tara, yeni biten maçları ekle."""
+def _use_col() -> bool:
+    if STORE_FORMAT == "col":
+        return True
+    return STORE_FORMAT == "auto" and ColumnStore(COLSTORE_DIR).exists()
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _col_row(r: dict):
+    """Normalize maç -> sütun demeti (id, lig, epoch sn, ev, dep, fthg, ftag) ya da None."""
+    d = _parse_dt(r.get("date"))
+    try:
+        return (int(r["id"]), int(r["leagueId"]), calendar.timegm(d.timetuple()),
+                int(r["homeId"]), int(r["awayId"]), int(r["fthg"]), int(r["ftag"]))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def import_jsonl(path: str = None) -> int:
+    """JSONL arşivini sütunlu depoya aktar (var olan id'ler atlanır)."""
+    path = path or STORE_PATH
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                r = _col_row(json.loads(line))
+            except Exception:
+                continue
+            if r:
+                rows.append(r)
+    return ColumnStore(COLSTORE_DIR).append(rows)
+
+
+def export_jsonl(path: str) -> int:
+    """Sütunlu depoyu JSONL'e yaz (isim alanları sütunlarda yok → dahil edilmez)."""
+    cs = ColumnStore(COLSTORE_DIR)
+    c = {name: cs.column(name) for name in ("id", "league", "ts", "home", "away", "fthg", "ftag")}
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(len(cs)):
+            dt = _EPOCH + timedelta(seconds=c["ts"][i])
+            f.write(json.dumps({
+                "id": c["id"][i], "leagueId": c["league"][i],
+                "date": dt.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "homeId": c["home"][i], "awayId": c["away"][i],
+                "fthg": c["fthg"][i], "ftag": c["ftag"][i],
+            }) + "\n")
+    return len(cs)
+
+
+class Ledger:
+    """Gün ledger'ı: {YYYYMMDD: {"matches": API'nin döndürdüğü, "added": yeni, "at": zaman}}.
+    Yalnız kesinleşmiş günler (en az REPOLL_DAYS gün önce) yazılır. Yazım atomik."""
+
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.days = json.load(f)
+        except (OSError, ValueError):
+            self.days = {}
+
+    def done(self, day) -> bool:
+        return day.strftime("%Y%m%d") in self.days
+
+    def mark(self, day, matches: int, added: int):
+        self.days[day.strftime("%Y%m%d")] = {
+            "matches": matches, "added": added,
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.days, f, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def gaps(self, start, end):
+        """[start, end] içinde ledger'da olmayan ardışık gün aralıkları: [(ilk, son), ...]."""
+        out = []
+        run = None
+        day = start
+        while day <= end:
+            if not self.done(day):
+                run = (run[0], day) if run else (day, day)
+            elif run:
+                out.append(run)
+                run = None
+            day += timedelta(days=1)
+        if run:
+            out.append(run)
+        return out
+
+
+def _append_day(f, col, seen: set, ms) -> int:
+    """Bir günün maçlarından yeni bitenleri JSONL'e (ve sütunlu depoya) yaz → eklenen sayı."""
+    day_added = 0
+    day_rows = []
+    for m in ms:
+        n = _norm(m)
+        if n and n["id"] and n["id"] not in seen:
+            seen.add(n["id"])
+            f.write(json.dumps(n, ensure_ascii=False) + "\n")
+            f.flush()
+            day_added += 1
+            day_rows.append(_col_row(n))
+    if col is not None:
+        col.append(r for r in day_rows if r)
+    return day_added
+
+
+def _collect(days_back_start: int, days_back_end: int, sleep: float = None,
+             workers: int = None, force: bool = False, base: str = None) -> int:
+    """[days_back_end .. days_back_start] gün öncesini tara, yeni biten maçları ekle.
+    JSONL her zaman yazılır (arşiv); sütunlu depo açıksa gün sonunda ona da eklenir.
+    Ledger'da tamam olan kesin günler atlanır (force=True: hepsi yeniden).
+    workers > 1 → günler crawler.py ile eşzamanlı çekilir (token bucket).
+    base: API tabanı (varsayılan BASE; test için yerel sahte sunucu)."""
     sleep = REQ_SLEEP if sleep is None else sleep
+    workers = CRAWL_WORKERS if workers is None else workers
     _check_key()  # baştan kontrol — boşuna döngüye girme
     os.makedirs(os.path.dirname(STORE_PATH) or ".", exist_ok=True)
-    seen = _existing_ids()
+    col = ColumnStore(COLSTORE_DIR) if _use_col() else None
+    seen = set(col.ids()) if col is not None else _existing_ids()
     today = datetime.now(timezone.utc).date()
+    ledger = Ledger()
+
+    def settled(day):  # sonuçları artık değişmeyecek gün
+        return (today - day).days >= REPOLL_DAYS
+
+    days = [today - timedelta(days=d) for d in range(days_back_end, days_back_start + 1)]
+    todo = [d for d in days if force or not (settled(d) and ledger.done(d))]
+    if len(todo) < len(days):
+        print(f"  [store] {len(days) - len(todo)} gün ledger'da tamam → atlandı")
+
+    def sink(day, ms):
+        n = _append_day(f, col, seen, ms)
+        if settled(day):
+            ledger.mark(day, len(ms), n)
+        return n
+
     added = 0
     with open(STORE_PATH, "a", encoding="utf-8") as f:
-        for d in range(days_back_end, days_back_start + 1):
-            day = today - timedelta(days=d)
+        if workers > 1:
+            from crawler import crawl
+            # store'un kendi nesneleri geçirilir: __main__ olarak koşarken de AuthError aynı sınıf
+            return crawl(todo, sink, fetch_day=matches_by_date,
+                         request=lambda path: _request(path, base), auth_error=_auth_error,
+                         rate_limited=RateLimited, workers=workers, rate=CRAWL_RPS,
+                         backoff=REQ_BACKOFF)
+        for day in todo:
             ymd = day.strftime("%Y%m%d")
             try:
-                ms = matches_by_date(ymd)
+                ms = matches_by_date(ymd, (lambda path: _fetch(path, base=base)) if base else None)
             except RateLimited as e:
                 print(f"  [store] {ymd} atlandı (rate-limit): {e}")
                 time.sleep(sleep)
                 continue
             # AuthError BİLEREK yakalanmıyor -> döngüyü durdurur (anahtar/plan sorunu)
-            day_added = 0
-            for m in ms:
-                n = _norm(m)
-                if n and n["id"] and n["id"] not in seen:
-                    seen.add(n["id"])
-                    f.write(json.dumps(n, ensure_ascii=False) + "\n")
-                    f.flush()
-                    added += 1
-                    day_added += 1
+            day_added = sink(day, ms)
+            added += day_added
             print(f"  [store] {ymd}: {len(ms)} maç, +{day_added} yeni (toplam +{added})")
             time.sleep(sleep)
     return added
@@ -229,10 +388,11 @@ def test_one() -> int:
     return len(ms)
 
 
-def backfill(days: int = 540) -> int:
-    """Son `days` günü geriye doğru doldur (bir kez çalıştırılır)."""
+def backfill(days: int = 540, force: bool = False) -> int:
+    """Son `days` günü geriye doğru doldur. Yarıda kalırsa aynı komut kaldığı yerden sürer
+    (ledger'daki günler atlanır)."""
     print(f"[store] backfill: son {days} gün, hedef {STORE_PATH} (sleep={REQ_SLEEP}s)")
-    return _collect(days, 1)
+    return _collect(days, 1, force=force)
 
 
 def update_recent(days: int = 3) -> int:
@@ -241,6 +401,31 @@ def update_recent(days: int = 3) -> int:
     return _collect(days, 0)
 
 
+def report_gaps(days: int = None):
+    """Ledger kapsamındaki boşlukları yazdır: eksik gün aralıkları + 0 maç dönen günler."""
+    ledger = Ledger()
+    end = datetime.now(timezone.utc).date() - timedelta(days=REPOLL_DAYS)
+    if days:
+        start = end - timedelta(days=days - 1)
+    elif ledger.days:
+        start = datetime.strptime(min(ledger.days), "%Y%m%d").date()
+    else:
+        print(f"[gaps] ledger boş ({LEDGER_PATH}) — önce backfill")
+        return []
+    holes = ledger.gaps(start, end)
+    missing = sum((b - a).days + 1 for a, b in holes)
+    print(f"[gaps] {start} .. {end}: {(end - start).days + 1} gün, {missing} eksik, "
+          f"{len(holes)} boşluk")
+    for a, b in holes:
+        print(f"   eksik: {a} .. {b} ({(b - a).days + 1} gün)")
+    empty = sorted(k for k, v in ledger.days.items()
+                   if not v.get("matches") and start.strftime("%Y%m%d") <= k)
+    if empty:
+        print(f"   0 maç dönen günler ({len(empty)}): {', '.join(empty[:20])}"
+              + (" ..." if len(empty) > 20 else ""))
+    return holes
+
+
 def _parse_dt(v):
     if v is None:
         return None
@@ -261,40 +446,121 @@ def _parse_dt(v):
 
 
 class ResultStore:
-    """Depoyu lige göre gruplayıp model.fit'in beklediği şekle döndürür."""
+    """Depoyu lige göre gruplayıp model.fit'in beklediği şekle döndürür.
+    Sütunlu depo açıksa (STORE_FORMAT) JSONL yerine ondan okur."""
+
+    _HEAD = 4096  # yeniden yazım tespiti için saklanan dosya başı (bayt)
 
     def __init__(self):
         self._by_league = None
         self._mtime = None
+        self._hashes = {}  # league_id -> içerik özeti (yeniden yüklemede sıfırlanır)
+        self._col = None
+        self._seen_ids = set()
+        self._offset = 0     # okunmuş son TAM satırın bittiği bayt
+        self._ino = None
+        self._head = b""
+        self._lock = threading.Lock()  # tek yükleyici; okuyucular eski referanslarla sürer
 
     def _load(self):
-        mt = os.path.getmtime(STORE_PATH) if os.path.exists(STORE_PATH) else 0
+        if self._col is None and _use_col():
+            self._col = ColumnStore(COLSTORE_DIR)
+        if self._col is not None:
+            if self._col.refresh():
+                self._hashes = {}
+            return
+        with self._lock:
+            self._load_jsonl()
+
+    def _load_jsonl(self):
+        try:
+            st = os.stat(STORE_PATH)
+        except FileNotFoundError:
+            st = None
+        mt = st.st_mtime if st else 0
         if self._by_league is not None and mt == self._mtime:
             return
+        if (self._by_league is not None and st is not None and st.st_ino == self._ino
+                and st.st_size >= self._offset and self._read_head() == self._head):
+            self._read_tail()  # yalnız eklenen satırlar
+        else:
+            self._read_full(st)
+        self._mtime = mt
+
+    def _read_head(self) -> bytes:
+        with open(STORE_PATH, "rb") as f:
+            return f.read(min(self._HEAD, self._offset))
+
+    def _ingest(self, by: dict, seen_ids: set, start: int):
+        """start baytından sonraki tam satırları by/seen_ids'e ekle → (yeni ofset, değişen ligler)."""
+        with open(STORE_PATH, "rb") as f:
+            f.seek(start)
+            buf = f.read()
+        end = buf.rfind(b"\n") + 1  # yarım yazılmış son satır bir sonraki okumaya kalır
+        touched = set()
+        for line in buf[:end].splitlines():
+            try:
+                r = json.loads(line)
+            except Exception:
+                continue
+            mid = r.get("id")
+            if mid in seen_ids:
+                continue
+            seen_ids.add(mid)
+            lid = r.get("leagueId")
+            by.setdefault(lid, []).append(r)
+            touched.add(lid)
+        return start + end, touched
+
+    def _read_full(self, st):
         by = {}
         seen_ids = set()  # mükerrer satırlara karşı (iki backfill aynı anda çalışmış olabilir)
-        if os.path.exists(STORE_PATH):
-            with open(STORE_PATH, encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        r = json.loads(line)
-                    except Exception:
-                        continue
-                    mid = r.get("id")
-                    if mid in seen_ids:
-                        continue
-                    seen_ids.add(mid)
-                    by.setdefault(r.get("leagueId"), []).append(r)
-        self._by_league = by
-        self._mtime = mt
+        offset = 0
+        if st is not None:
+            offset, _ = self._ingest(by, seen_ids, 0)
+        self._by_league, self._seen_ids, self._offset = by, seen_ids, offset
+        self._ino = st.st_ino if st else None
+        self._head = self._read_head() if st else b""
+        self._hashes = {}
+
+    def _read_tail(self):
+        # yazarken kopyala: eşzamanlı okuyucular eski dict/listeleri görmeye devam eder
+        new = {}
+        offset, touched = self._ingest(new, self._seen_ids, self._offset)
+        if touched:
+            by = dict(self._by_league)
+            for lid in touched:
+                by[lid] = by.get(lid, []) + new[lid]
+            hashes = {k: v for k, v in self._hashes.items() if k not in touched}
+            self._by_league, self._hashes = by, hashes
+        self._offset = offset
+        if len(self._head) < self._HEAD:
+            self._head = self._read_head()
 
     def reload(self):
-        self._by_league = None
+        # eski veri yeni yükleme bitene kadar görünür kalır (eşzamanlı okuyucular için)
+        self._mtime = None
         self._load()
 
+    def _col_fit(self, league_id: int):
+        cs = self._col
+        ts, hm, aw = cs.column("ts"), cs.column("home"), cs.column("away")
+        hg, ag = cs.column("fthg"), cs.column("ftag")
+        # lidx lig içinde (ts, satır) sıralı → ayrıca sıralama gerekmez
+        return [{
+            "date": _EPOCH + timedelta(seconds=ts[i]),
+            "season": "",
+            "home": str(hm[i]),
+            "away": str(aw[i]),
+            "fthg": hg[i],
+            "ftag": ag[i],
+        } for i in cs.league_rows(league_id)]
+
     def load_for_fit(self, league_id: int):
         """model.fit için: date(datetime), home/away (str id), fthg, ftag."""
         self._load()
+        if self._col is not None:
+            return self._col_fit(league_id)
         rows = self._by_league.get(league_id, [])
         out = []
         for r in rows:
@@ -312,22 +578,74 @@ class ResultStore:
         out.sort(key=lambda x: x["date"])
         return out
 
+    def load_frame(self, league_id: int) -> MatchFrame:
+        """load_for_fit'in sütunlu sürümü. Sütunlu depoda dict kurmadan doğrudan sütunlardan."""
+        self._load()
+        if self._col is None:
+            return MatchFrame.from_records(self.load_for_fit(league_id))
+        cs = self._col
+        rows = cs.league_rows(league_id)
+        ts, hm, aw = cs.column("ts"), cs.column("home"), cs.column("away")
+        teams = sorted({str(hm[i]) for i in rows} | {str(aw[i]) for i in rows})
+        code = {int(t): k for k, t in enumerate(teams)}
+        cols = {k: array(t) for k, t in FRAME_COLUMNS.items()}
+        day0 = _EPOCH.toordinal()
+        cols["ordinal"].extend(day0 + ts[i] // 86400 for i in rows)
+        cols["ts"].extend(day0 * 86400 + ts[i] for i in rows)
+        cols["home"].extend(code[hm[i]] for i in rows)
+        cols["away"].extend(code[aw[i]] for i in rows)
+        cols["fthg"].extend(cs.column("fthg")[i] for i in rows)
+        cols["ftag"].extend(cs.column("ftag")[i] for i in rows)
+        cols["season"].extend(0 for _ in rows)
+        nan = array("d", [float("nan")]) * len(rows)
+        for k in ("home_xg", "away_xg", "odds_home", "odds_draw", "odds_away"):
+            cols[k] = nan
+        return MatchFrame(cols, teams, [""])
+
+    def league_hash(self, league_id: int) -> str:
+        """Ligin maç kümesinin içerik özeti (id, tarih, takımlar, skor) — sıra bağımsız.
+        Model kaydı (registry.py) anahtarı: lig verisi değişmedikçe aynı kalır."""
+        self._load()
+        h = self._hashes.get(league_id)
+        if h is None and self._col is not None:
+            cs = self._col
+            cols = [cs.column(c) for c in ("id", "ts", "home", "away", "fthg", "ftag")]
+            sha = hashlib.sha1()
+            for i in sorted(cs.league_rows(league_id), key=lambda i: cols[0][i]):
+                sha.update(("|".join(str(c[i]) for c in cols) + "\n").encode("utf-8"))
+            h = self._hashes[league_id] = sha.hexdigest()[:16]
+        elif h is None:
+            rows = sorted(self._by_league.get(league_id, []), key=lambda r: str(r.get("id")))
+            sha = hashlib.sha1()
+            for r in rows:
+                sha.update(f"{r.get('id')}|{r.get('date')}|{r.get('homeId')}|{r.get('awayId')}|"
+                           f"{r.get('fthg')}|{r.get('ftag')}\n".encode("utf-8"))
+            h = self._hashes[league_id] = sha.hexdigest()[:16]
+        return h
+
     def league_count(self, league_id: int) -> int:
         self._load()
+        if self._col is not None:
+            return self._col.leagues().get(league_id, 0)
         return len(self._by_league.get(league_id, []))
 
     def total(self) -> int:
         self._load()
+        if self._col is not None:
+            return len(self._col)
         return sum(len(v) for v in self._by_league.values())
 
     def leagues(self):
         self._load()
+        if self._col is not None:
+            cnt = self._col.leagues()
+            return sorted(cnt, key=lambda k: -cnt[k])
         return sorted(self._by_league.keys(), key=lambda k: -len(self._by_league[k]))
 
 
 if __name__ == "__main__":
     cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
-    arg = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    arg = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else None
     try:
         if cmd == "test":
             test_one()
@@ -336,19 +654,30 @@ if __name__ == "__main__":
             fetch_league_map()
             sys.exit(0)
         elif cmd == "backfill":
-            n = backfill(arg or 540)
+            n = backfill(arg or 540, force="--force" in sys.argv)
             print(f"[store] backfill bitti: +{n} maç")
             sys.exit(0)
         elif cmd == "update":
             n = update_recent(arg or 3)
             print(f"[store] update bitti: +{n} maç")
             sys.exit(0)
+        elif cmd == "import":
+            src = sys.argv[2] if len(sys.argv) > 2 else STORE_PATH
+            n = import_jsonl(src)
+            print(f"[store] import: +{n} maç -> {COLSTORE_DIR}")
+            sys.exit(0)
+        elif cmd == "export" and len(sys.argv) > 2:
+            n = export_jsonl(sys.argv[2])
+            print(f"[store] export: {n} maç -> {sys.argv[2]}")
+            sys.exit(0)
     except AuthError as e:
         print(f"\n❌ ANAHTAR/PLAN HATASI:\n   {e}\n")
         sys.exit(2)
-    if cmd == "stats":
+    if cmd == "gaps":
+        report_gaps(arg)
+    elif cmd == "stats":
         s = ResultStore()
-        print(f"[store] dosya: {STORE_PATH}")
+        print(f"[store] dosya: {COLSTORE_DIR if _use_col() else STORE_PATH}")
         print(f"[store] toplam maç: {s.total()}")
         lm = load_league_map()
         if not lm:
@@ -357,4 +686,4 @@ if __name__ == "__main__":
         for lid in top:
             print(f"   {league_name(lid):28s} (id {lid}): {s.league_count(lid)} maç")
     else:
-        print("kullanım: store.py [test | leagues | backfill N | update N | stats]")
+        print("kullanım: store.py [test | leagues | backfill N [--force] | update N | stats | gaps [N] | import [F] | export F]")
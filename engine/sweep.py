@@ -0,0 +1,184 @@
+"""
+Hiperparametre taraması — backtest_xg / backtest_context / backtest_elo ızgaralarını
+süreç havuzunda koşar, sonuçları tek düzenli tabloya yazar.
+
+Izgara: lig × xg_weight × half_life × window × λ (ELO harmanı) × form/H2H beta'ları.
+Pahalı kısım walk-forward fit'tir ve yalnız (lig, xg_weight, half_life, window) hücresine
+bağlıdır → hücreler ProcessPoolExecutor'a dağıtılır; her hücre baz tahmini BİR KEZ üretir,
+tüm (λ, bf, bh) kombinasyonları o önbellekten skorlanır (harman → tilt sırası).
+Yüklenen özellik verisi (maçlar + ctx, lig başına süzülmüş ELO snapshot'ları) işçilere
+havuz initializer'ı ile bir kez aktarılır; hücre başına yeniden gönderilmez. Baz tahminler
+predcache'ten: aynı veriyle tekrar taramada fit_s ≈ yükleme süresi.
+
+Çıktı: satır başına bir (hücre, λ, bf, bh); metrikler + hücre fit süresi (fit_s) ve
+satır başına skorlama süresi (score_ms; λ başına tüm beta'lar metrics ile tek toplu skor).
+.csv → stdlib csv, .parquet → pandas (+pyarrow) gerekir.
+λ ızgarası yalnız 0 ise ELO snapshot'ı kurulmaz (soccerdata gerekmez).
+
+Çalıştır (venv):
+  SOCCERDATA_DIR=/tmp/soccerdata ../src/lib/data-sources/venv/bin/python sweep.py E0,SP1 \\
+      xg=0.5,0.75 hl=120,180 win=365,540 lam=0,0.2 bf=0,0.3 bh=0,0.1 workers=4 out=sweep.csv
+"""
+import csv
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import backtest_context as BC
+import backtest_elo as BE
+from data import prefetch
+from features import load_features
+from features_context import annotate_context
+import features_elo as FE
+import metrics as MT
+import predcache as PC
+
+GRID = {
+    "xg": (0.5, 0.75, 1.0),
+    "hl": (120, 180, 270),
+    "win": (365, 540),
+    "lam": (0.0,),
+    "bf": (0.0, 0.15, 0.30),
+    "bh": (0.0, 0.10),
+}
+START, END = 2019, 2024
+TEST_FROM = "2122"
+FIELDS = ("league", "xg_weight", "half_life", "window", "lam", "bf", "bh",
+          "n", "acc", "brier", "logloss", "ece", "bets", "roi", "elo_cov",
+          "fit_s", "score_ms", "pid")
+
+_DATA = {}  # işçi içinde: lig -> {"recs", "elo"}
+
+
+def _init(data):
+    global _DATA
+    _DATA = data
+
+
+def load(leagues, start=START, end=END, with_elo=False):
+    """Lig başına özellikler + ctx; with_elo ise ligin ülkesine süzülmüş snapshot + eşleme."""
+    prefetch(leagues, range(start, end + 1))
+    data = {}
+    for lg in leagues:
+        recs, _ = load_features(lg, start, end, verbose=False)
+        annotate_context(recs)
+        data[lg] = {"recs": recs, "elo": None}
+        print(f"[sweep] {lg}: {len(recs)} maç", flush=True)
+    if with_elo:
+        grid, snaps = FE.build_snapshots([m["date"] for d in data.values() for m in d["recs"]])
+        for lg, d in data.items():
+            cc = FE.CC.get(lg)
+            if cc is None:
+                continue
+            # dünya geneli snapshot yerine yalnız ligin ülkesi → işçilere giden yük küçük
+            own = {g: {k: v for k, v in s.items() if k[0] == cc} for g, s in snaps.items()}
+            fit = BE.fit_elo_map(d["recs"], grid, own, cc, test_from=TEST_FROM)
+            if fit:
+                d["elo"] = (FE.SnapshotIndex(grid, own), cc) + fit[:3]
+            else:
+                print(f"[sweep] {lg}: yetersiz eğitim ELO'su, λ>0 satırları baz ile aynı")
+    return data
+
+
+def _precompute(league, recs, elo, xg_weight, half_life, window):
+    """Hücrenin baz tahminleri: p (xG-DC, predcache), p_elo (ya da None), ctx, actual, odds."""
+    preds = []
+    base = PC.baseline(recs, xg_weight, TEST_FROM, half_life, window, league, verbose=False)
+    elos = [(None, None)] * len(base)
+    if elo is not None:
+        index, cc, a, b, total = elo
+        elos = zip(*index.lookup([m for m, _ in base], cc))
+    for (m, p), (eh, ea) in zip(base, elos):
+        p_elo = None
+        if eh is not None and ea is not None:
+            p_elo = BE.elo_probs(eh - ea, a, b, total)
+        preds.append({
+            "p": p, "p_elo": p_elo, "actual": m["ftr"], "ctx": m["ctx"],
+            "odds": {"H": m["odds_home"], "D": m["odds_draw"], "A": m["odds_away"]},
+        })
+    return preds
+
+
+def run_cell(league, xg_weight, half_life, window, lams, bfs, bhs):
+    """Bir hücre: fit bir kez, tüm (λ, bf, bh) kombinasyonları skorlanır. Satır listesi."""
+    d = _DATA[league]
+    t0 = time.perf_counter()
+    preds = _precompute(league, d["recs"], d["elo"], xg_weight, half_life, window)
+    fit_s = time.perf_counter() - t0
+    cov = sum(1 for e in preds if e["p_elo"] is not None) / len(preds) * 100 if preds else 0.0
+    rows = []
+    if not preds:
+        return rows
+    betas = list(itertools.product(bfs, bhs))
+    p, _, _ = MT.arrays(preds)
+    q, has = MT.optional(preds, "p_elo")
+    for lam, pl in zip(lams, MT.blend(p, q, lams, has)):
+        t1 = time.perf_counter()
+        scored = BC.score_grid(preds, betas, p=pl)   # tüm (bf, bh) tek toplu skorlama
+        per_ms = (time.perf_counter() - t1) * 1000 / len(betas)
+        for r in scored:
+            r.update(league=league, xg_weight=xg_weight, half_life=half_life, window=window,
+                     lam=lam, elo_cov=cov, fit_s=fit_s, score_ms=per_ms, pid=os.getpid())
+            rows.append(r)
+    return rows
+
+
+def write(rows, path):
+    if path.endswith(".parquet"):
+        import pandas as pd  # yalnız parquet çıktısı için (pyarrow / fastparquet gerekir)
+        pd.DataFrame(rows, columns=FIELDS).to_parquet(path, index=False)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+
+
+def sweep(leagues, grid=None, workers=None, out="sweep.csv", start=START, end=END):
+    g = dict(GRID, **(grid or {}))
+    lams, bfs, bhs = tuple(g["lam"]), tuple(g["bf"]), tuple(g["bh"])
+    data = load(leagues, start, end, with_elo=any(lam for lam in lams))
+    cells = list(itertools.product(leagues, g["xg"], g["hl"], g["win"]))
+    workers = workers or min(len(cells), os.cpu_count() or 1)
+    print(f"[sweep] {len(cells)} hücre × {len(lams) * len(bfs) * len(bhs)} kombinasyon, "
+          f"{workers} işçi", flush=True)
+
+    t0 = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init,
+                             initargs=(data,)) as ex:
+        futs = {ex.submit(run_cell, *c, lams, bfs, bhs): c for c in cells}
+        for i, fut in enumerate(as_completed(futs), 1):
+            c = futs[fut]
+            cell_rows = fut.result()
+            rows += cell_rows
+            fit_s = cell_rows[0]["fit_s"] if cell_rows else 0.0
+            print(f"  [{i}/{len(cells)}] {c[0]} w={c[1]:.2f} hl={c[2]} win={c[3]}: "
+                  f"{fit_s:.1f}s, {len(cell_rows)} satır", flush=True)
+    rows.sort(key=lambda r: tuple(r[k] for k in FIELDS[:7]))
+    write(rows, out)
+    print(f"[sweep] {len(rows)} satır -> {out} ({time.perf_counter() - t0:.1f}s)")
+    for lg in leagues:
+        lr = [r for r in rows if r["league"] == lg]
+        if lr:
+            b = min(lr, key=lambda r: r["logloss"])
+            print(f"  EN İYİ {lg}: w={b['xg_weight']:.2f} hl={b['half_life']} win={b['window']} "
+                  f"λ={b['lam']:.2f} bf={b['bf']:.2f} bh={b['bh']:.2f}  logloss={b['logloss']:.4f}")
+    return rows
+
+
+def _floats(s):
+    return tuple(float(x) for x in s.split(","))
+
+
+if __name__ == "__main__":
+    leagues = sys.argv[1].split(",") if len(sys.argv) > 1 else ["E0"]
+    opts = dict(a.split("=", 1) for a in sys.argv[2:] if "=" in a)
+    grid = {k: _floats(v) for k, v in opts.items() if k in GRID}
+    for k in ("hl", "win"):
+        if k in grid:
+            grid[k] = tuple(int(x) for x in grid[k])
+    sweep(leagues, grid, workers=int(opts["workers"]) if "workers" in opts else None,
+          out=opts.get("out", "sweep.csv"))
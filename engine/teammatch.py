@@ -0,0 +1,261 @@
+"""
+Ölçeklenebilir takım-adı eşleyici — features.build_team_map ve publish_xg.map_teams için.
+
+Eski yol her eşleşmemiş ad için TÜM hedefleri difflib ile puanlıyordu (ad × hedef, publish_xg'de
+ayrıca token × token). 20 takımda sorun değil; FotMob / Sportmonks / ClubElo kataloğu
+(binlerce kulüp) için kuadratik. Burada:
+
+  1. hedef adlar normalize edilip TERS İNDEKSE girer: token'lar + karakter 3-gram'ları
+     (çok yaygın gram'lar — hedeflerin MAX_DF'inden fazlasında geçen — atlanır);
+  2. aday üretimi: kaynak adın gram'larının posting listeleri, idf ağırlıklı Dice örtüşmesi
+     → en iyi TOP_K aday (kaynak başına alt-kuadratik);
+  3. yalnız bu adaylar çağıranın skor fonksiyonuyla puanlanır (eşik altı kenar atılır);
+  4. atama GLOBAL: kaynak–hedef kenar grafiği bağlı bileşenlere ayrılır, her bileşende
+     toplam skoru en büyükleyen birebir eşleme (Macar algoritması);
+  5. takma ad dosyası (TEAM_ALIAS_PATH, JSON {ad alanı: {kaynak: hedef}}): dosyadaki
+     eşlemeler önce uygulanır; yazım yalnız açıkça istenince — match(confirm=...) ile skoru
+     >= confirm yeni eşlemeler ya da çağıranın save_aliases ile kesinleştirdikleri
+     (dosya kilidi altında).
+Normalize biçimi birebir eşit tek aday çiftleri puanlamadan önce kesinleşir.
+Saf stdlib.
+"""
+import heapq
+import json
+import math
+import os
+from collections import defaultdict
+
+try:
+    import fcntl
+except ImportError:  # Windows: tek yazar varsayımı
+    fcntl = None
+
+from data import CACHE_DIR
+
+TEAM_ALIAS_PATH = os.environ.get("TEAM_ALIAS_PATH", os.path.join(CACHE_DIR, "team_aliases.json"))
+TOP_K = 8
+GRAM = 3
+MAX_DF = 0.2         # hedeflerin bu oranından (en az DF_FLOOR) fazlasında geçen gram atlanır
+DF_FLOOR = 32
+MAX_COMPONENT = 400  # daha büyük bileşende Macar yerine skor-sıralı greedy
+
+
+def grams(s: str, n: int = GRAM):
+    """Token'lar + '#'-dolgulu karakter n-gram'ları (küme)."""
+    out = set(s.split())
+    for tok in out.copy():
+        t = f"#{tok}#"
+        out.update(t[i:i + n] for i in range(max(1, len(t) - n + 1)))
+    return out
+
+
+class NameIndex:
+    """Hedef adların ters indeksi: gram → hedef kimlikleri."""
+
+    def __init__(self, targets, normalize=lambda s: s):
+        self.targets = list(targets)
+        self.normalize = normalize
+        self._norm = [normalize(t) for t in self.targets]
+        post = defaultdict(list)
+        for i, s in enumerate(self._norm):
+            for g in grams(s):
+                post[g].append(i)
+        n = max(1, len(self.targets))
+        cap = max(DF_FLOOR, int(MAX_DF * n))
+        self._post = {g: ids for g, ids in post.items() if len(ids) <= cap}
+        self._idf = {g: math.log(1.0 + n / len(ids)) for g, ids in self._post.items()}
+        self._mass = [self._weight(grams(s)) for s in self._norm]
+
+    def _weight(self, gs):
+        return sum(self._idf.get(g, 0.0) for g in gs)
+
+    def candidates(self, name, k=TOP_K):
+        """idf ağırlıklı gram örtüşmesi (Dice: 2·ortak / (kaynak + hedef)) en yüksek en fazla k
+        hedef; uzun adlar yalnız çok gram taşıdıkları için öne geçmez. Hedef sayısı ≤ k ise hepsi."""
+        if len(self.targets) <= k:
+            return list(self.targets)
+        acc = defaultdict(float)
+        q = grams(self.normalize(name))
+        for g in q:
+            ids = self._post.get(g)
+            if ids is None:
+                continue
+            w = self._idf[g]
+            for i in ids:
+                acc[i] += w
+        qm, mass = self._weight(q), self._mass
+        best = heapq.nlargest(k, acc, key=lambda i: (acc[i] / (qm + mass[i]), -i))
+        return [self.targets[i] for i in best]
+
+
+def _hungarian(cost):
+    """Kare olmayan (n ≤ m) maliyet matrisinde en küçük toplamlı atama: satır → sütun."""
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    p, way = [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], inf, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    return {p[j] - 1: j - 1 for j in range(1, m + 1) if p[j]}
+
+
+def _components(edges):
+    """edges: {(kaynak, hedef): skor} → [(kaynaklar, hedefler), ...] bağlı bileşenler."""
+    parent = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for s, t in edges:
+        parent[find(("s", s))] = find(("t", t))
+    comps = defaultdict(lambda: (set(), set()))
+    for s, t in edges:
+        c = comps[find(("s", s))]
+        c[0].add(s)
+        c[1].add(t)
+    return [(sorted(a), sorted(b)) for a, b in comps.values()]
+
+
+def assign(edges):
+    """Skor toplamını en büyükleyen birebir eşleme {kaynak: hedef} (bileşen bileşen)."""
+    out = {}
+    for srcs, tgts in _components(edges):
+        if len(srcs) * len(tgts) > MAX_COMPONENT * MAX_COMPONENT:
+            used, sset = set(), set(srcs)
+            for (s, t), _ in sorted(((k, v) for k, v in edges.items() if k[0] in sset),
+                                    key=lambda kv: -kv[1]):
+                if s not in out and t not in used:
+                    out[s] = t
+                    used.add(t)
+            continue
+        flip = len(srcs) > len(tgts)
+        rows, cols = (tgts, srcs) if flip else (srcs, tgts)
+        # maliyet = -skor; kenarsız çift 0 (atanırsa aşağıda atılır) → en büyük ağırlıklı eşleme
+        cost = [[-edges.get((c, r) if flip else (r, c), 0.0) for c in cols] for r in rows]
+        for i, j in _hungarian(cost).items():
+            s, t = (cols[j], rows[i]) if flip else (rows[i], cols[j])
+            if (s, t) in edges:
+                out[s] = t
+    return out
+
+
+def load_aliases(namespace, path=None):
+    path = path or TEAM_ALIAS_PATH
+    try:
+        with open(path, encoding="utf-8") as f:
+            return dict(json.load(f).get(namespace, {}))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_aliases(namespace, new, path=None):
+    """new eşlemelerini ad alanına ekle (dosyadaki elle girilmiş kayıtlar korunur).
+    Oku-değiştir-yaz dosya kilidi altında (eşzamanlı yazarlar birbirini ezmez), atomik."""
+    if not new:
+        return
+    path = path or TEAM_ALIAS_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        ns = data.setdefault(namespace, {})
+        changed = False
+        for s, t in new.items():
+            if s not in ns:
+                ns[s] = t
+                changed = True
+        if not changed:
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+
+def match(sources, targets, score, threshold, normalize=lambda s: s, k=TOP_K,
+          namespace=None, confirm=None, alias_path=None):
+    """
+    sources → targets birebir eşleme. score(kaynak, hedef) ∈ [0, 1]; eşik altı eşleşmez.
+    namespace verilirse takma ad dosyası okunur; confirm verilirse >= confirm skorlu yeni
+    bulanık eşlemeler dosyaya yazılır (varsayılan None: yalnız oku).
+    Döndürür: (mapping {kaynak: hedef}, unmatched [(kaynak, en iyi aday, skor), ...]).
+    """
+    targets = list(targets)
+    sset, tset = set(sources), set(targets)
+    mapping = {}
+    if namespace:
+        for s, t in load_aliases(namespace, alias_path).items():
+            if s in sset and t in tset and t not in mapping.values():
+                mapping[s] = t
+    used = set(mapping.values())
+
+    # normalize-eşit ve tek adaylı çiftler kesin (skor belirsizliğini atamaya taşımaz)
+    by_norm = defaultdict(list)
+    for t in targets:
+        if t not in used:
+            by_norm[normalize(t)].append(t)
+    src_norm = defaultdict(list)
+    for s in sources:
+        if s not in mapping:
+            src_norm[normalize(s)].append(s)
+    for n, ss in src_norm.items():
+        ts = by_norm.get(n)
+        if n and len(ss) == 1 and ts and len(ts) == 1:
+            mapping[ss[0]] = ts[0]
+            used.add(ts[0])
+
+    rest = [s for s in sources if s not in mapping]
+    index = NameIndex([t for t in targets if t not in used], normalize)
+
+    edges, best = {}, {}
+    for s in rest:
+        top = (None, 0.0)
+        for t in index.candidates(s, k):
+            sc = score(s, t)
+            if sc > top[1]:
+                top = (t, sc)
+            if sc >= threshold:
+                edges[(s, t)] = sc
+        best[s] = top
+    found = assign(edges)
+    mapping.update(found)
+
+    if namespace and confirm is not None:
+        save_aliases(namespace, {s: t for s, t in found.items() if edges[(s, t)] >= confirm},
+                     alias_path)
+    unmatched = [(s, best[s][0], round(best[s][1], 2)) for s in rest if s not in found]
+    return mapping, unmatched
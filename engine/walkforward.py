@@ -0,0 +1,166 @@
+"""
+Walk-forward fit penceresi — her yeni ref_date için fit()'i sıfırdan kurmak yerine
+sıralı eğitim penceresini KAYDIRIR.
+
+fit(matches, ref_date) her çağrıda tüm maç listesini iki list-comprehension ile süzer ve
+her maçın üstel zaman ağırlığını yeniden hesaplar → O(gün × pencere). Burada:
+  - maçlar bir kez tarihe göre sıralanır, hedefler (gol / xG harmanı) bir kez hesaplanır;
+  - ref_date ilerledikçe yeni maçlar pencereye EKLENİR, pencereden düşenler ÇIKARILIR
+    → adım başına O(yeni maç);
+  - ağırlık w = 2^(-(ref - gün)/yarı_ömür) = 2^(-(ref - çapa)/yarı_ömür) · 2^(-(çapa - gün)/yarı_ömür):
+    maç başına çapa-göreli u bir kez hesaplanır, ref ilerleyince TEK çarpanla ölçeklenir.
+
+fit_at(ref_date) model.fit / model_xg.fit ile aynı modeli döndürür (~1e-15).
+MultiWeightFitter aynı pencereyi birden çok xg_weight için bir kez yürür (model_xg.fit_many
+eşdeğeri) → xg_weight taraması tek walk-forward maliyetine yakın.
+ref_date geri giderse pencere baştan kurulur (doğru ama yavaş yol).
+
+    wf = WalkForwardFitter(matches, xg_weight=0.75)
+    for m in test_matches:               # tarihe göre artan
+        mdl = wf.fit_at(m["date"])
+    for m, pr in wf.predict_matches(test_matches):   # gün başına tek fit + tek predict_many
+        ...
+"""
+import math
+from collections import deque
+
+import model as M
+from model_xg import _targets
+
+_LN2 = math.log(2.0)
+_REANCHOR_HALF_LIVES = 32  # çapa ref'ten bu kadar yarı-ömür geride kalınca u'ları yeniden kur
+
+
+class WalkForwardFitter:
+    """Kayan pencereli walk-forward fit'çi. xg_weight=0 → model.fit, >0 → model_xg.fit eşdeğeri.
+    warm_start=True: her fit bir önceki fit'in parametrelerinden başlar (tol ile birlikte)."""
+
+    def __init__(self, matches, xg_weight=0.0, half_life_days=180, window_days=540,
+                 iters=25, min_matches=120, backend=None, tol=0.0, warm_start=False):
+        self.xg_weight = xg_weight
+        self.half_life_days = half_life_days
+        self.window_days = window_days
+        self.iters = iters
+        self.min_matches = min_matches
+        self.backend = backend
+        self.tol = tol
+        self.warm_start = warm_start
+        self._ms = sorted(matches, key=lambda m: m["date"])
+        self.fits = 0          # koşulan fit / toplam iterasyon (warm start kazancını görmek için)
+        self.iterations = 0
+        self.reset()
+
+    def reset(self):
+        self._next = 0         # _ms içinde pencereye henüz girmemiş ilk maç
+        self._win = deque()    # (ordinal, maç, hedef, u) — tarihe göre sıralı
+        self._anchor = None    # u'ların göreli olduğu gün (ordinal)
+        self._ref = None
+        self._model = None     # son fit (warm start + aynı ref için önbellek)
+        self._model_ref = None
+
+    def _u(self, ordinal):
+        return math.exp(-_LN2 * (self._anchor - ordinal) / self.half_life_days)
+
+    def advance(self, ref_date):
+        """Pencereyi ref_date'e getir: ref'ten önceki yeni maçları ekle, eskileri çıkar."""
+        if self._ref is not None and ref_date < self._ref:
+            self.reset()
+        ref_ord = ref_date.toordinal()
+        if self._anchor is None or ref_ord - self._anchor > _REANCHOR_HALF_LIVES * self.half_life_days:
+            self._anchor = ref_ord
+            self._win = deque((o, m, t, self._u(o)) for o, m, t, _ in self._win)
+
+        ms = self._ms
+        while self._next < len(ms) and ms[self._next]["date"] < ref_date:
+            m = ms[self._next]
+            o = m["date"].toordinal()
+            self._win.append((o, m, self._target(m), self._u(o)))
+            self._next += 1
+
+        if self.window_days:
+            cutoff = ref_ord - self.window_days
+            while self._win and self._win[0][0] < cutoff:
+                self._win.popleft()
+        self._ref = ref_date
+
+    def _target(self, m):
+        return _targets(m, self.xg_weight)
+
+    def __len__(self):
+        return len(self._win)
+
+    def fit_at(self, ref_date):
+        """fit(matches, ref_date) ile aynı model (ya da yetersiz maçta None)."""
+        if self._model_ref is not None and ref_date == self._model_ref:
+            return self._model
+        self.advance(ref_date)
+        if len(self._win) < self.min_matches:
+            return None
+
+        scale = math.exp(-_LN2 * (ref_date.toordinal() - self._anchor) / self.half_life_days)
+        train = [e[1] for e in self._win]
+        tgt = [e[2] for e in self._win]
+        w = [scale * e[3] for e in self._win]
+        init = self._model if self.warm_start else None
+        mdl = M.solve(train, w, tgt, iters=self.iters, backend=self.backend,
+                      tol=self.tol, init=init)
+        self._model, self._model_ref = mdl, ref_date
+        self.fits += 1
+        self.iterations += mdl["iters"]
+        return mdl
+
+    def predict_matches(self, matches):
+        """
+        Maçları gün gün tahmin et: her gün TEK fit (günün ilk maç tarihi) + TEK
+        model.predict_many çağrısı. (maç, tahmin | None) çiftleri üretir, giriş sırasıyla.
+        matches tarihe göre artan olmalı.
+        """
+        batch = []
+        for m in matches:
+            if batch and m["date"].toordinal() != batch[0]["date"].toordinal():
+                yield from self._predict_day(batch)
+                batch = []
+            batch.append(m)
+        if batch:
+            yield from self._predict_day(batch)
+
+    def _predict_day(self, batch):
+        mdl = self.fit_at(batch[0]["date"])
+        return zip(batch, M.predict_many(mdl, [(m["home"], m["away"]) for m in batch]))
+
+
+class MultiWeightFitter(WalkForwardFitter):
+    """Aynı pencerede birden çok xg_weight: pencere, u'lar ve ağırlıklar ortak; fit_at
+    xg_weights sırasıyla model listesi, predict_matches (maç, [tahmin | None, ...]) verir.
+    Her ağırlık kendi önceki modelinden warm start alır."""
+
+    def __init__(self, matches, xg_weights, **kw):
+        self.xg_weights = tuple(xg_weights)
+        super().__init__(matches, **kw)
+
+    def _target(self, m):
+        return tuple(_targets(m, xw) for xw in self.xg_weights)
+
+    def fit_at(self, ref_date):
+        if self._model_ref is not None and ref_date == self._model_ref:
+            return self._model
+        self.advance(ref_date)
+        if len(self._win) < self.min_matches:
+            return [None] * len(self.xg_weights)
+
+        scale = math.exp(-_LN2 * (ref_date.toordinal() - self._anchor) / self.half_life_days)
+        train = [e[1] for e in self._win]
+        w = [scale * e[3] for e in self._win]
+        tgts = [[e[2][i] for e in self._win] for i in range(len(self.xg_weights))]
+        inits = self._model if self.warm_start else None
+        mdls = M.solve_many(train, w, tgts, iters=self.iters, backend=self.backend,
+                            tol=self.tol, inits=inits)
+        self._model, self._model_ref = mdls, ref_date
+        self.fits += len(mdls)
+        self.iterations += sum(mdl["iters"] for mdl in mdls)
+        return mdls
+
+    def _predict_day(self, batch):
+        pairs = [(m["home"], m["away"]) for m in batch]
+        per_weight = [M.predict_many(mdl, pairs) for mdl in self.fit_at(batch[0]["date"])]
+        return zip(batch, map(list, zip(*per_weight)))